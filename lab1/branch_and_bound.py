@@ -0,0 +1,158 @@
+import logging
+import math
+import time
+from collections import namedtuple
+import numpy as np
+from cover_scoring import CoverScorer
+
+# solution: indices of the chosen lists (None if no cover was found), weight: its weight,
+# lower_bound: proven lower bound on the optimal weight (equal to weight when the search completed),
+# nodes: number of visited nodes
+BranchAndBoundResult = namedtuple("BranchAndBoundResult", "solution, weight, lower_bound, nodes")
+
+TIME_BUDGET = 60    # seconds
+MEMO_SIZE = 1_000_000   # maximum number of memoized sub-instances
+LAGRANGIAN_ITERATIONS = 1000    # subgradient steps optimizing the root multipliers
+
+# greedy cover used as the first incumbent: always picks the list with the lowest weight per newly covered integer
+def greedy(scorer: CoverScorer):
+    full = (1 << scorer.n) - 1
+    cover, solution, weight = 0, list(), 0
+    while cover != full:
+        new = scorer.lengths - scorer.num_repeats(cover)
+        if not new.any():
+            return None, math.inf
+        ratio = np.where(new > 0, scorer.lengths / np.maximum(new, 1), np.inf)
+        l = int(np.argmin(ratio))
+        solution.append(l)
+        cover |= scorer.masks[l]
+        weight += int(scorer.lengths[l])
+    return solution, weight
+
+# subgradient optimization of the Lagrangian multipliers of the root, starting from the element prices
+# (whose Lagrangian bound is the price bound). the step is scaled by the distance to the incumbent weight and
+# halved after 20 steps with no improvement. returns the best bound found and its multipliers
+def subgradient(scorer: CoverScorer, upper: float, iterations: int = LAGRANGIAN_ITERATIONS):
+    _, u = scorer.element_prices(0)
+    if math.isinf(upper):
+        # no cover exists
+        return math.inf, u
+    best_bound, best_u = -math.inf, u
+    incidence = scorer.incidence.astype(np.float64)
+    step, stall = 2.0, 0
+    for _ in range(iterations):
+        bound, reduced = scorer.lagrangian(u)
+        if bound > best_bound + 1e-9:
+            best_bound, best_u, stall = bound, u, 0
+        else:
+            stall += 1
+            if stall == 20:
+                step, stall = step / 2, 0
+        # the chosen lists are the ones with negative reduced cost
+        g = 1 - (reduced < 0) @ incidence
+        if not g.any() or step < 1e-4 or _ceil(best_bound) >= upper:
+            break
+        u = np.maximum(0, u + step * (upper - bound) / (g @ g) * g)
+    return best_bound, best_u
+
+# rounds a fractional bound up, since weights are integers
+def _ceil(x):
+    return x if math.isinf(x) else math.ceil(x - 1e-9)
+
+# exact depth-first branch and bound.
+# every node branches on the uncovered integer contained in the fewest allowed lists: the i-th child chooses
+# the i-th list containing it and forbids the previous ones, so no cover is generated twice.
+# a node is pruned when weight + lower bound is not better than the incumbent, or when the same cover
+# was already fully explored with no more weight and no more forbidden lists.
+# the bound of a node is the best of its price bound and its Lagrangian bound with the root multipliers.
+# children are ordered and pre-pruned with the prices and the reduced costs of their parent, which can only
+# underestimate theirs
+def branch_and_bound(lists: list, n: int, time_budget: float = TIME_BUDGET, memo_size: int = MEMO_SIZE) -> BranchAndBoundResult:
+    scorer = CoverScorer(lists, n)
+    num_lists = len(scorer)
+    full = (1 << n) - 1
+    deadline = time.perf_counter() + time_budget
+
+    best, best_weight = greedy(scorer)
+    root_bound, u = subgradient(scorer, best_weight)
+    nodes = 0
+    timed_out = False
+    memo = dict()   # cover -> (weight, forbidden lists) of a completely explored node
+
+    # returns a lower bound on the solutions left unexplored in the subtree (inf if it has been completely explored)
+    def visit(solution: list, cover: int, weight: int, forbidden: int, node_bound: float):
+        nonlocal best, best_weight, nodes, timed_out
+        if timed_out or time.perf_counter() > deadline:
+            timed_out = True
+            return node_bound
+        nodes += 1
+        if nodes % 1000 == 0:
+            logging.debug(f"N = {n}\tVisited nodes = {nodes}\tincumbent = {best_weight}")
+        if cover == full:
+            if weight < best_weight:
+                best, best_weight = list(solution), weight
+            return math.inf
+
+        allowed = ~scorer.to_array(forbidden, num_lists)
+        missing, prices = scorer.element_prices(cover, allowed)
+        # also prunes the nodes with an integer no allowed list can cover (infinite price)
+        if _ceil(weight + prices.sum()) >= best_weight:
+            return math.inf
+        lagrangian, reduced = scorer.lagrangian(u, cover, allowed)
+        if _ceil(weight + lagrangian) >= best_weight:
+            return math.inf
+        inc = scorer.incidence[:, missing]
+        e = int(np.flatnonzero(missing)[np.argmin(allowed.astype(np.int64) @ inc)])
+        candidates = np.array([l for l in scorer.covering(e) if allowed[l]], dtype=np.int64)
+        if len(candidates) == 0:
+            return math.inf
+
+        weights = weight + scorer.lengths[candidates]
+        # choosing l fixes it in the relaxation of the parent, adding its reduced cost if positive
+        bounds = np.maximum(weights + (prices.sum() - inc[candidates] @ prices),
+                            weight + lagrangian + np.maximum(reduced[candidates], 0))
+        order = np.lexsort((weights, bounds))
+
+        child_forbidden = forbidden
+        for i, k in enumerate(order.tolist()):
+            b = _ceil(float(bounds[k]))
+            if b >= best_weight:
+                break
+            l = int(candidates[k])
+            c, w = cover | scorer.masks[l], int(weights[k])
+            seen = memo.get(c)
+            if seen is None or seen[0] > w or seen[1] & ~child_forbidden != 0:
+                solution.append(l)
+                r = visit(solution, c, w, child_forbidden, b)
+                solution.pop()
+                if timed_out:
+                    return min([r] + [_ceil(float(bounds[j])) for j in order[i + 1:]])
+                if len(memo) < memo_size:
+                    memo[c] = (w, child_forbidden)
+            # the next children can't choose the lists explored so far
+            child_forbidden |= 1 << l
+        return math.inf
+
+    unexplored = visit(list(), 0, 0, 0, _ceil(max(scorer.lower_bound(0), root_bound)))
+    # every bound of an open node is valid, and so is the root relaxation
+    lower_bound = min(best_weight, max(unexplored, _ceil(root_bound)))
+    if timed_out:
+        logging.info(f"branch and bound: time budget of {time_budget}s exhausted after {nodes} nodes")
+    return BranchAndBoundResult(best, best_weight, lower_bound, nodes)
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    from lab1 import load, search
+    for N in [5, 10, 20, 50, 100]:
+        all_lists = load(N, seed=42, sort=True)
+        r = branch_and_bound(all_lists, N)
+        beam_solution, _ = search(N, mode="beam")
+        w = sum(len(_) for _ in beam_solution)
+        logging.info(f"branch and bound for N={N}: w={r.weight}, lower bound={r.lower_bound}, visited nodes={r.nodes}")
+        if r.lower_bound == r.weight:
+            logging.info(f"beam search gap: {(w - r.weight)/r.weight*100:.1f}%")
+        else:
+            # the lower bound is not tight, so the gap is only bounded, not measured
+            logging.info(f"beam search: {(w - r.weight)/r.weight*100:.1f}% over the best cover found, "
+                         f"{(w - r.lower_bound)/r.lower_bound*100:.1f}% over the lower bound")
@@ -0,0 +1,108 @@
+import numpy as np
+from set_cover_instance import Instance
+
+# number of set bits of every byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# number of set bits along the last axis of a packed (uint8) array
+def popcount(packed: np.ndarray) -> np.ndarray:
+    return _POPCOUNT[packed].sum(axis=-1, dtype=np.int64)
+
+class CoverScorer:
+    """Scores every candidate list of a state with a single NumPy pass over the list/element incidence matrix"""
+
+    # all_lists is an Instance, or a list of lists of integers in [0, n)
+    def __init__(self, all_lists, n: int):
+        if not isinstance(all_lists, Instance):
+            all_lists = Instance.from_lists(n, all_lists)
+        self._n = n
+        self._lengths = np.asarray(all_lists.lengths, dtype=np.int64)
+        incidence = all_lists.incidence()
+        # row i holds the bitmask of all_lists[i], little-endian, so that it matches the int bitmasks of State
+        self._packed = np.packbits(incidence, axis=1, bitorder="little")
+        self._masks = [int.from_bytes(r.tobytes(), "little") for r in self._packed]
+        self._incidence = None
+        self._covering = None
+
+    def __len__(self):
+        return len(self._masks)
+
+    @property
+    def n(self):
+        return self._n
+
+    @property
+    def lengths(self):
+        return self._lengths
+
+    @property
+    def packed(self):
+        return self._packed
+
+    @property
+    def masks(self):
+        return self._masks
+
+    @property
+    def incidence(self):
+        # dense (lists x elements) boolean matrix, built on first use to keep the memory footprint low for large N
+        if self._incidence is None:
+            self._incidence = np.unpackbits(self._packed, axis=1, count=self._n, bitorder="little").astype(bool)
+        return self._incidence
+
+    def covering(self, e: int) -> list:
+        # indices of the lists containing the integer e
+        if self._covering is None:
+            self._covering = [np.flatnonzero(c).tolist() for c in self.incidence.T]
+        return self._covering[e]
+
+    def to_array(self, mask: int, size: int) -> np.ndarray:
+        # int bitmask -> boolean vector of the given size
+        nbytes = (size + 7) // 8
+        b = np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8)
+        return np.unpackbits(b, count=size, bitorder="little").astype(bool)
+
+    def num_repeats(self, cover: int) -> np.ndarray:
+        # cardinality of the intersection between cover and every list
+        c = np.frombuffer(cover.to_bytes(self._packed.shape[1], "little"), dtype=np.uint8)
+        return popcount(self._packed & c)
+
+    def score(self, state):
+        # returns the indices of the lists that, if added to state, increase its cover,
+        # the bloat of the resulting states and the number of repeated integers each of them introduces
+        repeats = self.num_repeats(state.cover)
+        new = self._lengths - repeats
+        useful = (new > 0) & ~self.to_array(state.solution, len(self._masks))
+        idx = np.flatnonzero(useful)
+        n = state.cover_size() + new[idx]
+        b = (state.weight + self._lengths[idx] - n) / n
+        return idx, b, repeats[idx]
+
+    def element_prices(self, cover: int, allowed: np.ndarray = None):
+        # every integer e missing from cover pays at least min over the lists L containing e of len(L) / |L & missing|,
+        # and the shares paid by the integers covered by a list never exceed its length.
+        # allowed optionally restricts the lists that may still be chosen (boolean vector).
+        # returns the boolean vector of the missing integers and the price of each of them
+        missing = ~self.to_array(cover, self._n)
+        inc = self.incidence[:, missing]
+        useful = inc.sum(axis=1)
+        if allowed is not None:
+            useful = np.where(allowed, useful, 0)
+        price = np.full(len(self._masks), np.inf)
+        np.divide(self._lengths, useful, out=price, where=useful > 0)
+        return missing, np.where(inc, price[:, None], np.inf).min(axis=0, initial=np.inf)
+
+    def lagrangian(self, u: np.ndarray, cover: int = 0, allowed: np.ndarray = None):
+        # Lagrangian relaxation of the covering constraints of the integers missing from cover, with multipliers u >= 0:
+        # sum of u over the missing integers + the negative reduced costs len(L) - u(L & missing) of the allowed lists.
+        # any u gives a lower bound on the weight still needed; returns it with the reduced cost of every list
+        missing = ~self.to_array(cover, self._n)
+        um = np.where(missing, u, 0.0)
+        reduced = self._lengths - self.incidence @ um
+        free = reduced if allowed is None else reduced[allowed]
+        return float(um.sum() + np.minimum(free, 0).sum()), reduced
+
+    def lower_bound(self, cover: int, allowed: np.ndarray = None) -> float:
+        # admissible estimate of the weight still needed to cover the integers missing from cover
+        _, prices = self.element_prices(cover, allowed)
+        return float(prices.sum())
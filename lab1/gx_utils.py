@@ -4,18 +4,23 @@
 
 import heapq
 from collections import Counter
+import numpy as np
 
 
 class PriorityQueue:
-    """A basic Priority Queue with simple performance optimizations"""
+    """A basic Priority Queue with simple performance optimizations, decrease-key and lazy deletion"""
 
     def __init__(self):
         self._data_heap = list()
-        self._data_set = set()
+        self._data_set = dict()
+        self._stale = 0
 
     def __bool__(self):
         return bool(self._data_set)
 
+    def __len__(self):
+        return len(self._data_set)
+
     def __contains__(self, item):
         return item in self._data_set
 
@@ -23,15 +28,56 @@ class PriorityQueue:
         assert item not in self, f"Duplicated element"
         if p is None:
             p = len(self._data_set)
-        self._data_set.add(item)
+        self._data_set[item] = p
         heapq.heappush(self._data_heap, (p, item))
 
+    def push_many(self, items, priorities=None):
+        if priorities is None:
+            priorities = range(len(self._data_set), len(self._data_set) + len(items))
+        for item, p in zip(items, priorities):
+            assert item not in self, f"Duplicated element"
+            self._data_set[item] = p
+            self._data_heap.append((p, item))
+        heapq.heapify(self._data_heap)
+
+    def update(self, item, p):
+        """Changes the priority of item (pushing it if missing); the old heap entry is left behind and skipped later"""
+        if item not in self:
+            self.push(item, p)
+        elif self._data_set[item] != p:
+            self._data_set[item] = p
+            heapq.heappush(self._data_heap, (p, item))
+            self._stale += 1
+            if self._stale > len(self._data_set):
+                self._compact()
+
+    def priority(self, item):
+        return self._data_set[item]
+
+    def peek(self):
+        self._drop_stale()
+        return self._data_heap[0][1]
 
     def pop(self):
+        self._drop_stale()
         p, item = heapq.heappop(self._data_heap)
-        self._data_set.remove(item)
+        del self._data_set[item]
         return item
 
+    def _is_stale(self, entry):
+        p, item = entry
+        return item not in self._data_set or self._data_set[item] != p
+
+    def _drop_stale(self):
+        while self._data_heap and self._is_stale(self._data_heap[0]):
+            heapq.heappop(self._data_heap)
+            self._stale -= 1
+
+    def _compact(self):
+        self._data_heap = [(p, item) for item, p in self._data_set.items()]
+        heapq.heapify(self._data_heap)
+        self._stale = 0
+
 
 class Multiset:
     """Multiset"""
@@ -126,3 +172,122 @@ class Multiset:
         for i in self._data.keys():
             t.add(i, cnt=min(self[i], other[i]))
         return t
+
+
+class IntMultiset:
+    """Multiset of small non-negative integers backed by a NumPy count array, same API as Multiset"""
+
+    def __init__(self, init=None, *, size=0):
+        self._data = np.zeros(size, dtype=np.int64)
+        self._len = 0
+        if isinstance(init, IntMultiset):
+            self._data = init._data.copy()
+            self._len = init._len
+        elif init:
+            items = np.fromiter(init, dtype=np.int64)
+            assert items.size == 0 or items.min() >= 0, "Only non-negative integers are allowed"
+            counts = np.bincount(items, minlength=size)
+            self._grow(len(counts))
+            self._data[:len(counts)] += counts
+            self._len = int(items.size)
+
+    def _grow(self, size):
+        if size > len(self._data):
+            self._data = np.concatenate((self._data, np.zeros(max(size, 2 * len(self._data)) - len(self._data), dtype=np.int64)))
+
+    @staticmethod
+    def _aligned(a: "IntMultiset", b: "IntMultiset"):
+        # count arrays of a and b padded to the same length
+        size = max(len(a._data), len(b._data))
+        x = np.zeros(size, dtype=np.int64)
+        y = np.zeros(size, dtype=np.int64)
+        x[:len(a._data)] = a._data
+        y[:len(b._data)] = b._data
+        return x, y
+
+    @staticmethod
+    def _from_counts(counts: np.ndarray):
+        t = IntMultiset()
+        t._data = counts
+        t._len = int(counts.sum())
+        return t
+
+    def __contains__(self, item):
+        return 0 <= item < len(self._data) and self._data[item] > 0
+
+    def __getitem__(self, item):
+        return self.count(item)
+
+    def __iter__(self):
+        return iter(np.repeat(np.arange(len(self._data)), self._data).tolist())
+
+    def __len__(self):
+        return self._len
+
+    def __copy__(self):
+        return IntMultiset(self)
+
+    def __str__(self):
+        return f"M{{{', '.join(repr(i) for i in self)}}}"
+
+    def __repr__(self):
+        return str(self)
+
+    def __or__(self, other: "IntMultiset"):
+        x, y = IntMultiset._aligned(self, other)
+        return IntMultiset._from_counts(np.maximum(x, y))
+
+    def __and__(self, other: "IntMultiset"):
+        return self.intersection(other)
+
+    def __add__(self, other: "IntMultiset"):
+        return self.union(other)
+
+    def __sub__(self, other: "IntMultiset"):
+        x, y = IntMultiset._aligned(self, other)
+        assert not np.any((y > 0) & (x == 0)), f"Item not in collection"
+        return IntMultiset._from_counts(np.maximum(x - y, 0))
+
+    def __eq__(self, other: "IntMultiset"):
+        if self._len != other._len:
+            return False
+        x, y = IntMultiset._aligned(self, other)
+        return bool(np.array_equal(x, y))
+
+    def __le__(self, other: "IntMultiset"):
+        x, y = IntMultiset._aligned(self, other)
+        return bool(np.all(x <= y))
+
+    def __lt__(self, other: "IntMultiset"):
+        return self <= other and not self == other
+
+    def __ge__(self, other: "IntMultiset"):
+        return other <= self
+
+    def __gt__(self, other: "IntMultiset"):
+        return other < self
+
+    def add(self, item, *, cnt=1):
+        assert cnt >= 0, "Can't add a negative number of elements"
+        assert item >= 0, "Only non-negative integers are allowed"
+        if cnt > 0:
+            self._grow(item + 1)
+            self._data[item] += cnt
+            self._len += cnt
+
+    def remove(self, item, *, cnt=1):
+        assert item in self, f"Item not in collection"
+        cnt = min(cnt, int(self._data[item]))
+        self._data[item] -= cnt
+        self._len -= cnt
+
+    def count(self, item):
+        return int(self._data[item]) if 0 <= item < len(self._data) else 0
+
+    def union(self, other: "IntMultiset"):
+        x, y = IntMultiset._aligned(self, other)
+        return IntMultiset._from_counts(x + y)
+
+    def intersection(self, other: "IntMultiset"):
+        x, y = IntMultiset._aligned(self, other)
+        return IntMultiset._from_counts(np.minimum(x, y))
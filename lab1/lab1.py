@@ -1,137 +1,264 @@
+import heapq
 import logging
-import random
+import math
+import numpy as np
 from gx_utils import *
-import copy
-
-def problem(N, seed=None):
-    random.seed(seed)
-    return [
-        list(set(random.randint(0, N - 1) for n in range(random.randint(N // 5, N // 2))))
-        for n in range(random.randint(N, N * 5))
-    ]
-    
+from set_cover_instance import load, problem
+from cover_scoring import CoverScorer
+from reduction import load_reduced
+
+# converts a list of integers into a bitmask: bit i is set iff i is in the list
+def to_mask(l:list) -> int:
+    m = 0
+    for i in l:
+        m |= 1 << i
+    return m
+
 class State:
-    def __init__(self, sol:list):
-        self._solution = sol
-        self._set_cover()
-    
-    def _set_cover(self):
-        self._cover = set()
-        for l in self._solution:
-            self._cover.update(l)
-    
+    # _solution is a bitmask of the chosen list indices (bit i set iff all_lists[i] is in the solution)
+    # _cover is a bitmask of the covered integers, _weight is the sum of the lengths of the chosen lists
+    # a state is identified by its solution only, since cover and weight are derived from it
+    __slots__ = ("_solution", "_cover", "_weight")
+
+    def __init__(self, solution:int=0, cover:int=0, weight:int=0):
+        self._solution = solution
+        self._cover = cover
+        self._weight = weight
+
     def __hash__(self):
-        return hash((bytes(self._cover), bytes(sum(sum(_) for _ in self._solution))))
-    
+        return hash(self._solution)
+
     def __eq__(self, other):
         assert isinstance(self, type(other))
-        s1 = self._solution.sort()
-        s2 = other._solution.sort()
-        return s1 == s2
-     
+        return self._solution == other._solution
+
     def __lt__(self, other):
-        assert isinstance(self, type(other)) 
-        return sum(sum(_) for _ in self._solution) < sum(sum(_) for _ in other._solution)
-    
+        assert isinstance(self, type(other))
+        return (self._weight, self._solution) < (other._weight, other._solution)
+
     def __str__(self):
-        return str(self._solution)
+        return str(self.indices())
 
     def __repr__(self):
-        return repr(self._solution)     
-     
+        return f"State({self.indices()})"
+
     @property
     def solution(self):
         return self._solution
-    
+
     @property
     def cover(self):
         return self._cover
-    
-    def copy_solution(self):
-        return copy.deepcopy(self._solution)
 
-    
+    @property
+    def weight(self):
+        return self._weight
+
+    # number of distinct integers covered
+    def cover_size(self):
+        return self._cover.bit_count()
+
+    # indices of the chosen lists
+    def indices(self):
+        s = self._solution
+        r = list()
+        while s:
+            low = s & -s
+            r.append(low.bit_length() - 1)
+            s ^= low
+        return r
+
+    # the actual list of lists represented by the state
+    def lists(self, all_lists:list):
+        return [all_lists[i] for i in self.indices()]
+
+
 def goal_test(state:State, n:int):
-    return len(state.cover) == n
+    return state.cover == (1 << n) - 1
 
-# does the set difference between act_list and state.solution
+# does the set difference between all the lists and state.solution
 # compute the bloat of hypotetical new states and chooses the lists that
 # if added, yield a lower than average bloat
-def possible_actions(state:State, act_list:list):
-    r = list() # remaining lists
-    r_best = list() # best remaining  lists
-    b = list() # bloats of hypotetical new states
-    for l in act_list:
-        if l not in state.solution and state.cover.union(l) > state.cover:
-            r.append(l)
-            b.append(bloat(state.solution + [l]))
+# returns the indices of the chosen lists and the number of repeated integers each of them introduces
+def possible_actions(state:State, scorer:CoverScorer):
+    r, b, rep = scorer.score(state) # remaining lists, bloats of hypotetical new states, repeats
     if len(b) > 0:
-        avg_b = sum(b)/len(b)
-        for i in range(len(b)):
-            if b[i] <= avg_b:
-                r_best.append(r[i])
-    return r_best
-    
-def take_action(state:State, act:list):
-    c = state.copy_solution()
-    c.append(act)
-    return State(c)
-
-def bloat(sol:list):
-    if len(sol) == 0:
-        return 1
-    cov = set()
-    for s in sol:
-        cov.update(s)
-    m = sum(len(_) for _ in sol)
-    n = len(cov)
-    return (m-n)/n
-
-# return the cardinality of the intersection between state._cover and action
-def num_repeats(state:State, action:list):
-    return len(state._cover.intersection(set(action)))
-    
-def search(N):
+        best = b <= b.mean()
+        return r[best], rep[best]
+    return r, rep
+
+def take_action(state:State, act:int, scorer:CoverScorer):
+    return State(state.solution | (1 << int(act)), state.cover | scorer.masks[act], state.weight + int(scorer.lengths[act]))
+
+# remaining weight is an integer, so the fractional bound can be rounded up
+def heuristic(state:State, scorer:CoverScorer):
+    return math.ceil(scorer.lower_bound(state.cover) - 1e-9)
+
+# lowest integer not yet covered by state
+def first_uncovered(state:State, n:int):
+    u = ((1 << n) - 1) & ~state.cover
+    return (u & -u).bit_length() - 1
+
+# best-first search on the ad-hoc cost of the actions (see README)
+def ucs(N, scorer:CoverScorer, root:State):
     frontier=PriorityQueue()
     cnt = 0
     state_cost = dict()
     
-    all_lists = sorted(problem(N, seed=42), key=lambda a: len(a))
-    state = State(list()) 
+    state = root
     state_cost[state] = 0
     
     while state is not None and not goal_test(state, N):
         cnt += 1
         if cnt % 1000 == 0:
             logging.debug(f"N = {N}\tVisited nodes = {cnt}")
-        for a in possible_actions(state, all_lists):
-            new_state = take_action(state, a)
-			# the first term is a measure of the impurity (repeated integers) introduced by choosing action a
-			# the second term is a measure of simplicity: if we choose longer lists, the goal state is reached faster, visiting less nodes
-            cost = num_repeats(state, a)/len(a) - len(a)/N
-            if new_state not in state_cost and new_state not in frontier:
-                state_cost[new_state] = state_cost[state] + cost
-                frontier.push(new_state, p=state_cost[new_state])
-            # don't care to upgrade state_cost since the equal solutions have the same cover
+        actions, repeats = possible_actions(state, scorer)
+        # the first term is a measure of the impurity (repeated integers) introduced by choosing action a
+        # the second term is a measure of simplicity: if we choose longer lists, the goal state is reached faster, visiting less nodes
+        costs = repeats/scorer.lengths[actions] - scorer.lengths[actions]/N
+        for a, cost in zip(actions.tolist(), costs.tolist()):
+            new_state = take_action(state, a, scorer)
+            new_cost = state_cost[state] + cost
+            if new_state not in state_cost:
+                state_cost[new_state] = new_cost
+                frontier.push(new_state, p=new_cost)
+            elif new_state in frontier and new_cost < state_cost[new_state]:
+                # cheaper path to a state still waiting in the frontier
+                state_cost[new_state] = new_cost
+                frontier.update(new_state, new_cost)
         if frontier:
             state = frontier.pop()
         else:
             state = None
            
-    solution = state.solution        
+    return state, cnt
+
+# A* on the weight of the solution, with an admissible lower bound on the weight still needed.
+# every cover contains a list with the lowest uncovered integer, so only those lists are expanded.
+# the weight of a state doesn't depend on the path, hence the first time a state is reached is the best one
+def astar(N, scorer:CoverScorer, root:State):
+    frontier = PriorityQueue()
+    reached = set()
+    cnt = 0
+
+    state = root
+    reached.add(state)
+    frontier.push(state, p=(heuristic(state, scorer), 0))
+    while frontier:
+        state = frontier.pop()
+        if goal_test(state, N):
+            return state, cnt
+        cnt += 1
+        if cnt % 1000 == 0:
+            logging.debug(f"N = {N}\tVisited nodes = {cnt}")
+        for a in scorer.covering(first_uncovered(state, N)):
+            new_state = take_action(state, a, scorer)
+            if new_state not in reached:
+                reached.add(new_state)
+                # ties on f are broken in favour of the deeper state, closer to a goal
+                frontier.push(new_state, p=(new_state.weight + heuristic(new_state, scorer), -new_state.weight))
+    return None, cnt
+
+# iterative deepening A*: depth-first search bounded on f = weight + heuristic, memory is linear in the solution length
+def idastar(N, scorer:CoverScorer, root:State):
+    cnt = 0
+
+    def bounded_dfs(state:State, bound:int):
+        nonlocal cnt
+        cnt += 1
+        if cnt % 1000 == 0:
+            logging.debug(f"N = {N}\tVisited nodes = {cnt}")
+        if goal_test(state, N):
+            return state, state.weight
+        children = list()
+        for a in scorer.covering(first_uncovered(state, N)):
+            new_state = take_action(state, a, scorer)
+            children.append((new_state.weight + heuristic(new_state, scorer), new_state))
+        next_bound = math.inf
+        for f, new_state in sorted(children):
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            found, t = bounded_dfs(new_state, bound)
+            if found is not None:
+                return found, t
+            next_bound = min(next_bound, t)
+        return None, next_bound
+
+    state = root
+    bound = heuristic(state, scorer)
+    while bound < math.inf:
+        logging.debug(f"N = {N}\tIDA* bound = {bound}")
+        found, bound = bounded_dfs(state, bound)
+        if found is not None:
+            return found, cnt
+    return None, cnt
+
+BEAM_WIDTH = 10
+
+# beam search on the same cost as ucs: every level keeps only the beam_width cheapest states.
+# each state of the beam contributes at most beam_width children, so no more than
+# beam_width * (beam_width + 1) states are alive at any time, whatever the size of the instance
+def beam(N, scorer:CoverScorer, root:State, beam_width:int=BEAM_WIDTH):
+    cnt = 0
+    if goal_test(root, N):
+        return root, cnt
+    level = [(0.0, root)]
+    while level:
+        children = dict()
+        goals = list()
+        for cost, state in level:
+            cnt += 1
+            if cnt % 1000 == 0:
+                logging.debug(f"N = {N}\tVisited nodes = {cnt}")
+            actions, repeats = possible_actions(state, scorer)
+            costs = cost + repeats/scorer.lengths[actions] - scorer.lengths[actions]/N
+            if len(actions) > beam_width:
+                best = np.argpartition(costs, beam_width)[:beam_width]
+                actions, costs = actions[best], costs[best]
+            for a, c in zip(actions.tolist(), costs.tolist()):
+                new_state = take_action(state, a, scorer)
+                if goal_test(new_state, N):
+                    goals.append(new_state)
+                elif c < children.get(new_state, math.inf):
+                    children[new_state] = c
+        if goals:
+            return min(goals, key=lambda s: s.weight), cnt
+        level = heapq.nsmallest(beam_width, ((c, s) for s, c in children.items()))
+    return None, cnt
+
+SEARCH_MODES = {"ucs": ucs, "astar": astar, "idastar": idastar, "beam": beam}
+
+# with reduced=True the lists are preprocessed by reduce_instance: the search starts from the forced lists
+# and only chooses among the surviving ones
+def search(N, mode="ucs", seed=42, reduced=False, **kwargs):
+    all_lists = load(N, seed=seed, sort=True)
+    forced = list()
+    if reduced:
+        r = load_reduced(N, seed=seed, sort=True)
+        forced = [all_lists[i].tolist() for i in r.forced]
+        all_lists = r.lists
+        logging.debug(f"N = {N}\treduced instance: {len(r.lists)} lists, {len(forced)} forced")
+    scorer = CoverScorer(all_lists, N)
+    root = State(0, to_mask(e for l in forced for e in l), sum(len(l) for l in forced))
+
+    state, cnt = SEARCH_MODES[mode](N, scorer, root, **kwargs)
+
+    solution = forced + [l.tolist() for l in state.lists(all_lists)]
 
     logging.info(
-        f"search solution for N={N}: w={sum(len(_) for _ in solution)} (bloat={(sum(len(_) for _ in solution)-N)/N*100:.0f}%)"
+        f"{'search' if mode == 'ucs' else mode + ' search'} solution for N={N}: w={sum(len(_) for _ in solution)} (bloat={(sum(len(_) for _ in solution)-N)/N*100:.0f}%)"
     )
     logging.info(f"Visited nodes = {cnt}")
     logging.debug(f"{solution}")
-
-logging.getLogger().setLevel(logging.INFO)
-
+    return solution, cnt
 
 if __name__ == "__main__":
+	logging.getLogger().setLevel(logging.INFO)
 	for N in [5, 10, 20, 50]:
 	    search(N)
+	for N in [100, 500, 1000, 5000]:
+	    search(N, mode="beam")
 
     #%timeit search(20)
     
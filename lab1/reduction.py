@@ -0,0 +1,73 @@
+from collections import namedtuple
+import numpy as np
+from cover_scoring import CoverScorer
+from set_cover_instance import CACHE_DIR, Instance, cache_paths, cached_arrays, load
+
+# lists: the lists still worth choosing (an Instance), index: their position in the original instance,
+# forced: positions (in the original instance) of the lists that belong to every solution
+ReducedInstance = namedtuple("ReducedInstance", "lists, index, forced")
+
+# removes duplicated, useless and dominated lists and fixes the lists that are the only ones covering some integer.
+# the weight of a list is its full length, so a list is dominated by another one only if the other covers
+# at least the same uncovered integers and it is not longer (a plain subset is cheaper, hence it's kept).
+# lists is an Instance, or a list of lists of integers in [0, n)
+def reduce_instance(lists, n: int) -> ReducedInstance:
+    if not isinstance(lists, Instance):
+        lists = Instance.from_lists(n, lists)
+    scorer = CoverScorer(lists, n)
+    inc = scorer.incidence
+    lengths = scorer.lengths
+
+    # lists with the same integers have the same packed row
+    first = dict()
+    for i, row in enumerate(scorer.packed):
+        first.setdefault(row.tobytes(), i)
+    alive = np.zeros(len(lists), dtype=bool)
+    alive[list(first.values())] = True
+
+    covered = np.zeros(n, dtype=bool)
+    forced = list()
+    changed = True
+    while changed:
+        changed = False
+        useful = inc[:, ~covered].sum(axis=1)
+        alive &= useful > 0
+
+        rows = scorer.packed & np.packbits(~covered, bitorder="little")
+        for a in np.flatnonzero(alive):
+            cand = alive & (lengths <= lengths[a]) & (useful >= useful[a])
+            cand[a] = False
+            idx = np.flatnonzero(cand)
+            if len(idx) == 0:
+                continue
+            superset = np.all((rows[idx] & rows[a]) == rows[a], axis=1)
+            # when two lists are equivalent, the one with the lower index survives
+            better = (lengths[idx] < lengths[a]) | (useful[idx] > useful[a]) | (idx < a)
+            if np.any(superset & better):
+                alive[a] = False
+
+        counts = inc[alive].sum(axis=0)
+        for e in np.flatnonzero(~covered & (counts == 1)):
+            if covered[e]:
+                continue
+            l = np.flatnonzero(alive & inc[:, e])[0]
+            forced.append(int(l))
+            alive[l] = False
+            covered |= inc[l]
+            changed = True
+
+    index = np.flatnonzero(alive).tolist()
+    return ReducedInstance(lists.subset(index), index, sorted(forced))
+
+# reduce_instance applied to load(N, seed, sort=sort), cached next to the instance: the surviving lists
+# are memory-mapped instead of being copied out of the original instance at every call
+def load_reduced(N, seed=None, cache_dir=CACHE_DIR, sort=False) -> ReducedInstance:
+    if seed is None:
+        return reduce_instance(load(N, seed, sort=sort), N)
+    def build():
+        r = reduce_instance(load(N, seed, cache_dir, sort), N)
+        return r.lists.offsets, r.lists.elements, r.index, np.array(r.forced, dtype=np.int64)
+    paths = cache_paths(N, seed, cache_dir, "_sorted_reduced" if sort else "_reduced",
+                        ("offsets", "elements", "index", "forced"))
+    offsets, elements, index, forced = cached_arrays(paths, build)
+    return ReducedInstance(Instance(N, offsets, elements), index.tolist(), forced.tolist())
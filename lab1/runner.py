@@ -0,0 +1,81 @@
+import csv
+import json
+import logging
+import os
+import resource
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from set_cover_instance import load
+
+# (N, seed, mode) of the searches to run
+JOBS = [(N, 42, mode) for N in [5, 10, 20, 50] for mode in ["ucs", "astar", "idastar", "beam"]] + \
+       [(N, 42, "beam") for N in [100, 500, 1000, 5000]]
+WORKERS = os.cpu_count()
+TIME_LIMIT = 600            # seconds per job
+MEMORY_LIMIT = 4 * 2**30    # bytes of address space per job
+OUTPUT = "results.jsonl"    # .jsonl or .csv
+
+FIELDS = ["N", "seed", "mode", "status", "weight", "bloat", "visited_nodes", "wall_time", "peak_memory_mb"]
+
+def _timeout(signum, frame):
+    raise TimeoutError()
+
+# runs a single search in a fresh worker process (see max_tasks_per_child), so that the limits
+# and the peak memory reported by getrusage only concern this job
+def run_job(N, seed, mode, time_limit=TIME_LIMIT, memory_limit=MEMORY_LIMIT):
+    from lab1 import search
+    logging.getLogger().setLevel(logging.WARNING)
+
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+    signal.signal(signal.SIGALRM, _timeout)
+    signal.alarm(time_limit)
+
+    result = {"N": N, "seed": seed, "mode": mode, "status": "ok", "weight": None, "bloat": None, "visited_nodes": None}
+    start = time.perf_counter()
+    try:
+        solution, cnt = search(N, mode=mode, seed=seed)
+        w = sum(len(_) for _ in solution)
+        result.update(weight=w, bloat=(w - N) / N, visited_nodes=cnt)
+    except TimeoutError:
+        result["status"] = "timeout"
+    except MemoryError:
+        result["status"] = "out of memory"
+    finally:
+        signal.alarm(0)
+    result["wall_time"] = time.perf_counter() - start
+    result["peak_memory_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+# runs the jobs in a process pool and appends every result to output as soon as it is available.
+# the (length-sorted) instances are cached before starting the workers, which then memory-map the same files
+def run(jobs=JOBS, output=OUTPUT, workers=WORKERS, time_limit=TIME_LIMIT, memory_limit=MEMORY_LIMIT):
+    for N, seed in sorted(set((N, seed) for N, seed, _ in jobs)):
+        load(N, seed, sort=True)
+    as_csv = output.endswith(".csv")
+    results = list()
+    with open(output, "a", newline="") as f, \
+         ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        writer = csv.DictWriter(f, fieldnames=FIELDS) if as_csv else None
+        if as_csv and f.tell() == 0:
+            writer.writeheader()
+        futures = [pool.submit(run_job, N, seed, mode, time_limit, memory_limit) for N, seed, mode in jobs]
+        for future in as_completed(futures):
+            r = future.result()
+            if as_csv:
+                writer.writerow(r)
+            else:
+                f.write(json.dumps(r) + "\n")
+            f.flush()
+            logging.info(
+                f"{r['mode']} N={r['N']} seed={r['seed']}: {r['status']}, w={r['weight']}, "
+                f"visited nodes={r['visited_nodes']}, {r['wall_time']:.2f}s, {r['peak_memory_mb']:.0f} MB"
+            )
+            results.append(r)
+    return results
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    run()
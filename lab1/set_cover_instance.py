@@ -0,0 +1,122 @@
+import os
+import random
+import numpy as np
+
+# instances are cached here as two .npy files per (N, seed) (and per variant: sorted, reduced), loaded memory-mapped
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".instance_cache")
+
+class Instance:
+    """A set covering instance in CSR form: the integers of list i are elements[offsets[i]:offsets[i+1]]"""
+
+    def __init__(self, n: int, offsets: np.ndarray, elements: np.ndarray):
+        self._n = n
+        self._offsets = offsets
+        self._elements = elements
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        # zero-copy view on the i-th list
+        return self._elements[self._offsets[i]:self._offsets[i + 1]]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def n(self):
+        return self._n
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def elements(self):
+        return self._elements
+
+    @property
+    def lengths(self):
+        return np.diff(self._offsets)
+
+    # (lists x N) boolean matrix, built from the CSR arrays without going through Python lists
+    def incidence(self) -> np.ndarray:
+        inc = np.zeros((len(self), self._n), dtype=bool)
+        inc[np.repeat(np.arange(len(self)), self.lengths), self._elements] = True
+        return inc
+
+    # a new instance made of the lists in index, in that order
+    def subset(self, index) -> "Instance":
+        index = np.asarray(index, dtype=np.int64)
+        lengths = self.lengths[index]
+        offsets = np.zeros(len(index) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # position in elements of every integer of the subset: start of its list + its rank in the list
+        pos = np.repeat(self._offsets[:-1][index] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return Instance(self._n, offsets, np.asarray(self._elements[pos]))
+
+    # the same lists, sorted by length (stable, as sorted(lists, key=len))
+    def sorted_by_length(self) -> "Instance":
+        return self.subset(np.argsort(self.lengths, kind="stable"))
+
+    def to_lists(self) -> list:
+        # plain list of lists, as returned by the old problem()
+        e = self._elements.tolist()
+        o = self._offsets.tolist()
+        return [e[o[i]:o[i + 1]] for i in range(len(self))]
+
+    @staticmethod
+    def from_lists(n: int, lists: list) -> "Instance":
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l in lists], out=offsets[1:])
+        elements = np.fromiter((e for l in lists for e in l), dtype=np.int32, count=int(offsets[-1]))
+        return Instance(n, offsets, elements)
+
+# same lists as the professor's generator, but drawn from a private RNG: the global one is left untouched
+def generate(N, seed=None) -> Instance:
+    rnd = random.Random(seed)
+    lists = [
+        list(set(rnd.randint(0, N - 1) for n in range(rnd.randint(N // 5, N // 2))))
+        for n in range(rnd.randint(N, N * 5))
+    ]
+    return Instance.from_lists(N, lists)
+
+# paths of the cached .npy files of (N, seed) for the given variant, one per name
+def cache_paths(N, seed, cache_dir, variant="", names=("offsets", "elements")):
+    base = os.path.join(cache_dir, f"sc_{N}_{seed}{variant}")
+    return tuple(f"{base}.{name}.npy" for name in names)
+
+# memory-maps the arrays saved in paths, calling build() to compute and save them on the first call.
+# every file is written atomically and paths[0] last: an entry is complete when its first file exists
+def cached_arrays(paths, build) -> tuple:
+    if not all(os.path.exists(path) for path in paths):
+        arrays = build()
+        os.makedirs(os.path.dirname(paths[0]), exist_ok=True)
+        for path, data in reversed(list(zip(paths, arrays))):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, data)
+            os.replace(tmp, path)
+    return tuple(np.load(path, mmap_mode="r") for path in paths)
+
+# returns the instance (N, seed), generating and caching it on the first call.
+# cached instances are memory-mapped read-only, so they load in constant time and are shared between processes.
+# with sort=True the lists are sorted by length, and the sorted instance is cached too, so it is memory-mapped as well
+def load(N, seed=None, cache_dir=CACHE_DIR, sort=False) -> Instance:
+    if seed is None:
+        instance = generate(N)
+        return instance.sorted_by_length() if sort else instance
+    if sort:
+        def build():
+            instance = load(N, seed, cache_dir).sorted_by_length()
+            return instance.offsets, instance.elements
+        offsets, elements = cached_arrays(cache_paths(N, seed, cache_dir, "_sorted"), build)
+    else:
+        def build():
+            instance = generate(N, seed)
+            return instance.offsets, instance.elements
+        offsets, elements = cached_arrays(cache_paths(N, seed, cache_dir), build)
+    return Instance(N, offsets, elements)
+
+def problem(N, seed=None):
+    return load(N, seed).to_lists()
@@ -0,0 +1,78 @@
+import json
+import math
+import os
+import random
+from array import array
+from collections import namedtuple
+import numpy as np
+from fitness_cache import FitnessCache
+
+CHECKPOINT_EVERY = 10   # generations between two checkpoints
+
+# generation: last completed generation, genomes: index genomes of the population (fittest first),
+# best / stall: best fitness so far and generations since it last improved, stats: counters of the run,
+# cache: the FitnessCache of the run (None if it had none)
+Checkpoint = namedtuple("Checkpoint", "generation, genomes, best, stall, stats, cache")
+
+# concatenation of byte strings of the given typecode, with their lengths
+def _pack(items, typecode: str):
+    return (np.array([len(x) for x in items], dtype=np.int64) // array(typecode).itemsize,
+            np.frombuffer(b"".join(items), dtype=typecode))
+
+def _unpack(lengths: np.ndarray, data: np.ndarray, typecode: str):
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    items = list()
+    for i in range(len(offsets) - 1):
+        a = array(typecode)
+        a.frombytes(data[offsets[i]:offsets[i + 1]].tobytes())
+        items.append(a)
+    return items
+
+# writes the state of the GA (and of the global RNG) to path, atomically: a crash while saving leaves the previous checkpoint intact.
+# the cache is saved too (keys in LRU order, values and hit counters), so that a resumed run finds the same hits
+def save(path: str, generation: int, population, best: float, stall: int, stats: dict, cache: FitnessCache = None):
+    genomes = [ind.genome for ind in population]
+    typecode = genomes[0].typecode if genomes else "H"
+    lengths, genes = _pack([g.tobytes() for g in genomes], typecode)
+    entries = list(cache.items()) if cache is not None else []
+    key_lengths, keys = _pack([k for k, _ in entries], typecode)
+    version, mt, gauss = random.getstate()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            generation=generation,
+            typecode=typecode,
+            lengths=lengths,
+            genes=genes,
+            rng_version=version,
+            rng=np.array(mt, dtype=np.uint32),
+            rng_gauss=math.nan if gauss is None else gauss,
+            best=best,
+            stall=stall,
+            stats=json.dumps(stats),
+            cache=cache is not None,
+            cache_maxsize=cache.maxsize if cache is not None else 0,
+            cache_counters=np.array([cache.hits, cache.misses] if cache is not None else [0, 0], dtype=np.int64),
+            cache_key_lengths=key_lengths,
+            cache_keys=keys,
+            cache_weights=np.array([v[0] for _, v in entries], dtype=np.int64),
+            cache_valid=np.array([v[1] for _, v in entries], dtype=bool),
+        )
+    os.replace(tmp, path)
+
+# reads a checkpoint written by save and restores the global RNG, so that the run continues exactly as it would have
+def load(path: str) -> Checkpoint:
+    with np.load(path) as d:
+        typecode = str(d["typecode"])
+        genomes = _unpack(d["lengths"], d["genes"], typecode)
+        cache = None
+        if bool(d["cache"]):
+            cache = FitnessCache(int(d["cache_maxsize"]))
+            keys = _unpack(d["cache_key_lengths"], d["cache_keys"], typecode)
+            for k, w, v in zip(keys, d["cache_weights"].tolist(), d["cache_valid"].tolist()):
+                cache.put(k.tobytes(), (w, v))
+            cache.hits, cache.misses = (int(x) for x in d["cache_counters"])
+        gauss = float(d["rng_gauss"])
+        random.setstate((int(d["rng_version"]), tuple(int(x) for x in d["rng"]), None if math.isnan(gauss) else gauss))
+        return Checkpoint(int(d["generation"]), genomes, float(d["best"]), int(d["stall"]), json.loads(str(d["stats"])), cache)
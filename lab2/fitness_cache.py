@@ -0,0 +1,51 @@
+from array import array
+from collections import OrderedDict
+
+CACHE_SIZE = 100_000    # maximum number of cached genomes
+
+# canonical form of a genome: the order of the genes doesn't change the cover, so the key is the sorted index array
+def canonical(genome: array) -> bytes:
+    return array(genome.typecode, sorted(genome)).tobytes()
+
+class FitnessCache:
+    """Size-bounded LRU cache of genome evaluations, keyed by the canonical form of the genome"""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def items(self):
+        # (key, value) pairs from the least recently used: putting them back in this order rebuilds the cache
+        return self._data.items()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
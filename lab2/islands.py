@@ -0,0 +1,106 @@
+import multiprocessing as mp
+import os
+import queue
+import random
+from array import array
+import set_covering_genetic as sg
+from set_cover_instance import load
+from reduction import load_reduced
+
+ISLANDS = os.cpu_count()
+ISLAND_POPULATION = 200     # individuals per island
+GENERATIONS = 1000
+MIGRATION_INTERVAL = 50     # generations between two migrations
+MIGRANTS = 5                # best individuals sent to the next island at every migration
+MIGRATION_TIMEOUT = 600     # seconds an island waits for its immigrants before giving up
+POLL_INTERVAL = 1           # seconds between two checks of the island processes while waiting for their results
+
+def _genome(data: bytes) -> array:
+    genome = array(sg.GENOME_TYPECODE)
+    genome.frombytes(data)
+    return genome
+
+# body of an island process. The islands form a ring: every MIGRATION_INTERVAL generations island i sends a copy
+# of its best MIGRANTS genomes to island i+1, and replaces its worst individuals with the ones received from island i-1.
+# genomes travel as the raw bytes of their index arrays, the counters are rebuilt by the receiver.
+# if the previous island sends nothing within MIGRATION_TIMEOUT seconds (e.g. it crashed) queue.Empty is raised
+def _island(i: int, n: int, seed: int, generations: int, inbox, outbox, results):
+    sg.n = n
+    sg.POPULATION_SIZE = ISLAND_POPULATION
+    sg.load_instance()
+    random.seed(seed)
+
+    population = sg.initialize_population(sg.alleles)
+    migrants = 0
+    done = 0
+    while done < generations:
+        epoch = min(MIGRATION_INTERVAL, generations - done)
+        population = sg.evolve(population, epoch)
+        done += epoch
+        if done < generations:
+            outbox.put([ind.genome.tobytes() for ind in population[:MIGRANTS]])
+            immigrants = [sg.Individual(_genome(g)) for g in inbox.get(timeout=MIGRATION_TIMEOUT)]
+            migrants += len(immigrants)
+            population = sorted(population[:len(population) - len(immigrants)] + immigrants,
+                                key=lambda ind: ind.fitness, reverse=True)
+
+    weights = [ind.weight for ind in population]
+    results.put({
+        "island": i,
+        "seed": seed,
+        "best_weight": population[0].weight + sg.forced_weight,
+        "mean_weight": sum(weights) / len(weights) + sg.forced_weight,
+        "best_genome": population[0].genome.tobytes(),
+        "immigrants": migrants,
+        **sg.stats,
+    })
+
+# runs k islands in parallel, each in its own process and with its own seed.
+# returns the best genome found (as a list of indices into the alleles of the (possibly reduced) instance), its weight
+# and the statistics of every island. n and seed default to sg.n and sg.SEED.
+# raises RuntimeError, after terminating the other islands, as soon as an island process fails
+def run_islands(k: int = ISLANDS, n: int = None, generations: int = GENERATIONS, seed: int = None):
+    n = sg.n if n is None else n
+    seed = sg.SEED if seed is None else seed
+    # cached once here, then every island memory-maps the same files
+    if sg.REDUCE:
+        load_reduced(n, sg.SEED)
+    else:
+        load(n, sg.SEED)
+    queues = [mp.Queue() for _ in range(k)]
+    results = mp.Queue()
+    processes = [
+        mp.Process(target=_island, args=(i, n, seed + i, generations, queues[i], queues[(i + 1) % k], results))
+        for i in range(k)
+    ]
+    for p in processes:
+        p.start()
+    island_stats = []
+    while len(island_stats) < k:
+        try:
+            island_stats.append(results.get(timeout=POLL_INTERVAL))
+        except queue.Empty:
+            # an island that exits without error has already sent its result
+            failed = [i for i, p in enumerate(processes) if p.exitcode not in (None, 0)]
+            if failed:
+                for p in processes:
+                    p.terminate()
+                    p.join()
+                raise RuntimeError(f"island {failed[0]} failed with exit code {processes[failed[0]].exitcode}")
+    island_stats.sort(key=lambda r: r["island"])
+    for p in processes:
+        p.join()
+
+    best = min(island_stats, key=lambda r: r["best_weight"])
+    sg.n = n
+    sg.load_instance()
+    return _genome(best["best_genome"]).tolist(), best["best_weight"], island_stats
+
+
+if __name__ == '__main__':
+    genome, weight, island_stats = run_islands()
+    for r in island_stats:
+        print(f"island {r['island']} (seed {r['seed']}): best weight {r['best_weight']}, mean weight {r['mean_weight']:.1f}, "
+              f"evaluations {r['evaluations']}, immigrants {r['immigrants']}")
+    print(f"n: {sg.n}")
+    print(f"weight: {weight}")
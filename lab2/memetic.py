@@ -0,0 +1,63 @@
+import math
+import sys
+import time
+import random
+from collections import namedtuple
+import set_covering_genetic as ga
+
+# compares the plain GA with the memetic hybrid (lab1 beam search seeds + local search of the elite offspring)
+# on the generations and the time needed to reach a target weight.
+# the targets are weights the plain GA does reach: its first run (without target) gives its initial and final best weight
+
+N = [100, 500, 1000]
+GENERATIONS = 1000
+TARGETS = (0.5, 0.9, 1.0)   # weights to reach, as fractions of the improvement of the plain GA over its initial best weight
+SEEDS = 8
+
+# name -> (SEEDS, LOCAL_SEARCH)
+CONFIGS = {"plain": (0, False), "seeded": (SEEDS, False), "local search": (0, True), "memetic": (SEEDS, True)}
+
+# the seeds followed by random individuals, as in set_covering_genetic's __main__
+def initial_population(seeds: int) -> list:
+    population = ga.seed_population(seeds) if seeds else []
+    return population + ga.initialize_population(ga.alleles, ga.POPULATION_SIZE - len(population))
+
+# initial / weight: best weight of the initial and of the final population, generations: generations needed to reach
+# the target (None if it was not reached), counted from the initial population, i.e. after seeding: 0 means the seeds
+# are already on target. seconds: time of the whole run, seeding: time spent building the initial population
+# (the beam searches of the seeds included)
+Run = namedtuple("Run", "initial, weight, generations, seconds, seeding")
+
+def run(seeds: int, local_search: bool, generations: int = GENERATIONS, target: int = None):
+    ga.SEEDS, ga.LOCAL_SEARCH = seeds, local_search
+    ga.stats.update(dict.fromkeys(ga.stats, 0))
+    ga.stats.pop('target_reached', None)
+    ga.stats.pop('early_stop', None)
+    random.seed(ga.SEED)
+    start = time.perf_counter()
+    population = initial_population(seeds)
+    seeding = time.perf_counter() - start
+    engine = ga.PopulationEngine(ga.alleles, ga.n, ga.forced_cover)
+    engine.evaluate_individuals(population)
+    initial = min(i.weight for i in population) + ga.forced_weight
+    population = ga.evolve(population, generations, engine, ga.FitnessCache(), target=target)
+    return Run(initial, population[0].weight + ga.forced_weight, ga.stats.get('target_reached'),
+               time.perf_counter() - start, seeding)
+
+if __name__ == '__main__':
+    for n in (N if len(sys.argv) < 2 else [int(a) for a in sys.argv[1:]]):
+        ga.n = n
+        ga.load_instance()
+        print(f"n = {n}, best weight in {GENERATIONS} generations")
+        for name, config in CONFIGS.items():
+            r = run(*config)
+            print(f"    {name:<12}  {r.initial} -> {r.weight}  {r.seconds:7.2f} s  (initial population {r.seeding:.2f} s)")
+            if name == "plain":
+                plain = r
+        for t in TARGETS:
+            target = plain.initial - math.ceil(t * (plain.initial - plain.weight))
+            print(f"  target weight = {target} (bloat {(target - n) / n:.0%})")
+            for name, config in CONFIGS.items():
+                r = run(*config, target=target)
+                reached = f"{r.generations} generations" if r.generations is not None else "not reached"
+                print(f"    {name:<12}  {reached:<16}  {r.seconds:7.2f} s  (initial population {r.seeding:.2f} s, w = {r.weight})")
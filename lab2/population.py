@@ -0,0 +1,38 @@
+import numpy as np
+from set_cover_instance import Instance
+
+class PopulationEngine:
+    """Evaluates many individuals at once: their genomes are the rows of an (individuals x alleles) count matrix,
+    multiplied by the (alleles x elements) incidence matrix of the instance"""
+
+    # alleles is an Instance, or a list of lists of elements in [0, n)
+    def __init__(self, alleles, n: int, forced_cover=()):
+        if not isinstance(alleles, Instance):
+            alleles = Instance.from_lists(n, alleles)
+        self._n = n
+        self._lengths = alleles.lengths.astype(np.float32)
+        self._incidence = alleles.incidence().astype(np.float32)
+        self._forced = np.zeros(n, dtype=bool)
+        self._forced[list(forced_cover)] = True
+
+    def encode(self, genomes: list) -> np.ndarray:
+        # genomes are arrays of allele indices: row r counts how many times each allele appears in genomes[r]
+        counts = np.zeros((len(genomes), len(self._lengths)), dtype=np.float32)
+        rows = np.repeat(np.arange(len(genomes)), [len(g) for g in genomes])
+        cols = np.concatenate([np.frombuffer(g, dtype=g.typecode) for g in genomes]) if genomes else rows
+        np.add.at(counts, (rows, cols), 1)
+        return counts
+
+    def evaluate(self, counts: np.ndarray):
+        # validity (full cover), weight and fitness of every row of counts
+        covered = (counts @ self._incidence > 0) | self._forced
+        valid = covered.all(axis=1)
+        weight = np.rint(counts @ self._lengths).astype(np.int64)
+        return valid, weight, -weight
+
+    def evaluate_individuals(self, individuals: list) -> list:
+        # evaluates the individuals with a single matrix product, stores their weight and returns their validity
+        valid, weight, _ = self.evaluate(self.encode([i.genome for i in individuals]))
+        for i, w in zip(individuals, weight.tolist()):
+            i.weight = w
+        return valid.tolist()
@@ -1,43 +1,162 @@
+import os
+import sys
 import random
-import copy
+from array import array
+import numpy as np
 
-def problem(N, seed=None):
-    random.seed(seed)
-    return [
-        list(set(random.randint(0, N - 1) for n in range(random.randint(N // 5, N // 2))))
-        for n in range(random.randint(N, N * 5))
-    ]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab1"))
+from reduction import load_reduced
+from cover_scoring import CoverScorer
+from lab1 import State, beam, to_mask
+from set_cover_instance import load
+from population import PopulationEngine
+from survivors import SortedPopulation
+from fitness_cache import FitnessCache, canonical
+from telemetry import Telemetry
+import checkpoint
 
 class Individual:
-    # gene = list in the list of lists generated by "problem()"
-    # genome = list of genes
+    # gene = list of the instance loaded by "load()", stored as its index in "alleles"
+    # genome = array of genes (indices), so copying and slicing a genome never touches the lists themselves
     # individual = conceptually, it is a representation of a genome with some extra information (set of covered elements w/o repetitions, weight)
     # weight = nr of elements covered by considering the repetitions
     # fittness = -weight
+    # count = nr of genes (or forced lists) covering each element, uncovered = nr of elements with count 0:
+    # they are kept up to date gene by gene, so changing a locus costs O(|gene|) instead of O(|genome|)
 
-    def __init__(self, genome: list):
+    def __init__(self, genome: array, count: np.ndarray = None, weight: int = None, uncovered: int = None):
         self.genome = genome
-        self.representation = set()
-        self.weight = 0
+        self._representation = None
+        if count is None:
+            count = base_count.copy()
+            for t in genome:
+                count[allele_arrays[t]] += 1
+            weight = sum(allele_lengths[t] for t in genome)
+            uncovered = int(np.count_nonzero(count == 0))
+        self._count = count
+        self._weight = weight
+        self._uncovered = uncovered
 
-        for t in genome:
-            self.representation.update(set(t))
-            self.weight += len(t)
+    # a new individual with the given genome, whose counters start from a copy of the ones of self
+    def derive(self, genome: array) -> "Individual":
+        return Individual(genome, self._count.copy(), self._weight, self._uncovered)
 
-        #self.fitness = self.weight - len(self.representation)
-        self.fitness = -self.weight
+    # counters update after a gene t has been added to or removed from the genome
+    def _add(self, t):
+        idx = allele_arrays[t]
+        self._uncovered -= int(np.count_nonzero(self._count[idx] == 0))
+        self._count[idx] += 1
+        self._weight += allele_lengths[t]
+        self._representation = None
+
+    def _remove(self, t):
+        idx = allele_arrays[t]
+        self._count[idx] -= 1
+        self._uncovered += int(np.count_nonzero(self._count[idx] == 0))
+        self._weight -= allele_lengths[t]
+        self._representation = None
+
+    @property
+    def representation(self):
+        if self._representation is None:
+            self._representation = set()
+            for t in self.genome:
+                self._representation.update(alleles[t].tolist())
+        return self._representation
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def uncovered(self):
+        return self._uncovered
+
+    @property
+    def valid(self):
+        return self._uncovered == 0
+
+    @property
+    def weight(self):
+        return self._weight
+
+    @weight.setter
+    def weight(self, w):
+        self._weight = w
+
+    @property
+    def fitness(self):
+        #return self.weight - len(self.representation)
+        return -self.weight
 
     @property
     def genome_copy(self):
-        return copy.deepcopy(self.genome)
+        return self.genome[:]
 
 n = 100
 SEED = 42
 POPULATION_SIZE = 1000
 OFFSPRING = 10
 GENERATIONS = 1000
+REDUCE = False  # preprocess the instance with lab1's reduce_instance (removes nothing from the seed 42 instances with n >= 100)
+USE_ENGINE = True   # evaluate the offspring in batches with a PopulationEngine
+REPAIR = True   # patch the offspring into solutions instead of retrying the genetic operators
+DROP_REDUNDANT = True   # the repair also removes the genes whose elements are all covered by other genes
+CACHE = True    # remember the evaluation of the genomes already seen (LRU, see fitness_cache.CACHE_SIZE)
+UNIQUE = True   # reject the offspring whose genome is already in the population (without it the repaired clones take over)
+TELEMETRY = None    # path of the JSONL file with one record per generation (e.g. "telemetry.jsonl")
+PATIENCE = None     # stop after this many generations without improvement of the best fitness
+CHECKPOINT = None   # path of the checkpoint file (e.g. "ga.ckpt"), written every checkpoint.CHECKPOINT_EVERY generations
+RESUME = False      # continue the run saved in CHECKPOINT, if the file exists
+SEEDS = 0           # initial individuals built by lab1's beam search (one per width in SEED_BEAM_WIDTHS, duplicates dropped)
+SEED_BEAM_WIDTHS = (1, 2, 3, 4, 5, 10, 20, 50)
+LOCAL_SEARCH = False    # improve the elite offspring with local_search
+ELITE = 0.05            # fraction of the population an offspring must enter to be an elite one
+LOCAL_SEARCH_MOVES = 10     # maximum number of swaps of a local search
+
+alleles = []
+allele_lengths = []
+allele_arrays = []  # elements of every allele as a NumPy array, used to update the counters of the individuals
+base_count = np.zeros(0, dtype=np.int32)    # counters of the empty genome: 1 for the elements covered by forced lists
+GENOME_TYPECODE = "H"   # unsigned short indices, switched to "I" for instances with more than 65535 lists
+forced = []         # genes that are part of every solution, kept out of the genomes
+forced_cover = set()
+forced_weight = 0
+cheapest = []       # cheapest[e] = index of the shortest allele containing the element e (None if there's none)
+covering = []       # covering[e] = indices of the alleles containing the element e, shortest first
+allele_sets = []    # elements of every allele as a set, used by the local search
+
+# repaired counts every repair (initial population and seeds included), offspring_repaired only the offspring of evolve
+stats = {'evaluations': 0, 'rejected': 0, 'repaired': 0, 'offspring_repaired': 0, 'discarded': 0, 'swaps': 0}
 
-alleles = problem(N=n, seed=SEED)
+# loads the (n, SEED) instance from the shared cache and fills the alleles (called by __main__, not at import time)
+def load_instance():
+    global alleles, allele_lengths, allele_arrays, base_count, forced, forced_cover, forced_weight, cheapest, covering, allele_sets, GENOME_TYPECODE
+    instance = load(n, seed=SEED)
+    if REDUCE:
+        reduced = load_reduced(n, seed=SEED)
+        alleles = reduced.lists
+        forced = [instance[i].tolist() for i in reduced.forced]
+    else:
+        alleles = instance
+        forced = []
+    lengths = alleles.lengths
+    allele_lengths = lengths.tolist()
+    allele_arrays = list(alleles)   # views on the elements of the instance
+    GENOME_TYPECODE = "H" if len(alleles) <= 0xFFFF else "I"
+    forced_cover = set(e for l in forced for e in l)
+    forced_weight = sum(len(l) for l in forced)
+    base_count = np.zeros(n, dtype=np.int32)
+    base_count[list(forced_cover)] = 1
+    # the alleles containing every element, sorted by (element, length, index) and split by element
+    owner = np.repeat(np.arange(len(alleles)), lengths)
+    by = np.lexsort((owner, lengths[owner], alleles.elements))
+    bounds = np.cumsum(np.bincount(alleles.elements, minlength=n))[:-1]
+    covering = [c.tolist() for c in np.split(owner[by], bounds)]
+    cheapest = [c[0] if c else None for c in covering]
+    allele_sets = [set(a) for a in alleles.to_lists()]
+    random.seed(SEED)   # problem() used to seed the global RNG, keep the runs reproducible
+    return alleles
 
 #def initialize_population(alleles):    # IGNORE THIS
 #    population = []
@@ -56,83 +175,266 @@ alleles = problem(N=n, seed=SEED)
 #
 #    return population
 
-def check_solution(genome):     # used for producing the first "generation" of individuals in the population
-    s = set()                   # used also for checking if a new individual produced by mutation or recombination is a solution
-    for l in genome:
-        s.update(set(l))
-
-    solutionRepr = set(range(0, n))
-
-    return s == solutionRepr
-
-def initialize_population(alleles):
+def initialize_population(alleles, size: int = None):
     population = []
     
     i = 0
-    while i < POPULATION_SIZE:
-        genome = []
-        while not check_solution(genome):
-            allele = alleles[random.randint(0, len(alleles)-1)]
-            genome.append(allele)
-
-        population.append(Individual(genome=genome))
+    while i < (POPULATION_SIZE if size is None else size):
+        genome = array(GENOME_TYPECODE)
+        if REPAIR:  # random genes up to a total weight of n, then the repair covers what is missing
+            weight = 0
+            while weight < n:
+                genome.append(random.randint(0, len(alleles)-1))
+                weight += allele_lengths[genome[-1]]
+            population.append(repair(Individual(genome=genome)))
+        else:
+            ind = Individual(genome)
+            while not ind.valid:    # the counters are updated gene by gene
+                genome.append(random.randint(0, len(alleles)-1))
+                ind._add(genome[-1])
+            population.append(ind)
         i+=1
 
     return population
-    
+
+# covers found by lab1's beam search (its cost is the bloat), one per beam width: width 1 is the greedy cover.
+# they are returned as individuals, shortened by the local search
+def seed_population(k: int):
+    scorer = CoverScorer(alleles, n)
+    root = State(0, to_mask(forced_cover), forced_weight)
+    seeds, seen = [], set()
+    for width in SEED_BEAM_WIDTHS[:k]:
+        state, _ = beam(n, scorer, root, beam_width=width)
+        if state is None:
+            break
+        ind = local_search(repair(Individual(array(GENOME_TYPECODE, state.indices())), True))
+        key = canonical(ind.genome)
+        if key not in seen:
+            seen.add(key)
+            seeds.append(ind)
+    return seeds
+
+# turns the genome of ind into a solution in one pass: every uncovered element is covered with the cheapest allele containing it.
+# with drop_redundant, the genes whose elements are all covered by other genes are removed, longest first
+def repair(ind: Individual, drop_redundant: bool = None) -> Individual:
+    # works in place: ind must own its genome and counters (as the offspring of the genetic operators do).
+    # drop_redundant defaults to DROP_REDUNDANT, read at call time
+    if drop_redundant is None:
+        drop_redundant = DROP_REDUNDANT
+    if ind.uncovered > 0:
+        for e in np.flatnonzero(ind.count == 0).tolist():
+            if ind.count[e] == 0 and cheapest[e] is not None:
+                ind.genome.append(cheapest[e])
+                ind._add(cheapest[e])
+        stats['repaired'] += 1
+
+    if drop_redundant:
+        genome = ind.genome
+        dropped = set()
+        for locus in sorted(range(len(genome)), key=lambda l: allele_lengths[genome[l]], reverse=True):
+            if ind.count[allele_arrays[genome[locus]]].min() > 1:
+                ind._remove(genome[locus])
+                dropped.add(locus)
+        if dropped:
+            ind.genome = array(genome.typecode, (t for l, t in enumerate(genome) if l not in dropped))
+
+    return ind
+
+# bounded first-improvement local search on a solution: a gene t is swapped with a shorter allele that contains
+# every element covered by t only, at most moves times (LOCAL_SEARCH_MOVES by default); then the redundant genes are dropped.
+# works in place, as repair
+def local_search(ind: Individual, moves: int = None) -> Individual:
+    if moves is None:
+        moves = LOCAL_SEARCH_MOVES
+    genome, count = ind.genome, ind.count
+    improved = True
+    while improved and moves > 0:
+        improved = False
+        for locus in sorted(range(len(genome)), key=lambda l: allele_lengths[genome[l]], reverse=True):
+            t = genome[locus]
+            idx = allele_arrays[t]
+            only = idx[count[idx] == 1].tolist()
+            if not only:    # redundant, dropped below
+                continue
+            for u in covering[only[0]]:
+                if allele_lengths[u] >= allele_lengths[t]:
+                    break
+                if allele_sets[u].issuperset(only):
+                    ind._add(u)
+                    ind._remove(t)
+                    genome[locus] = u
+                    stats['swaps'] += 1
+                    moves -= 1
+                    improved = True
+                    break
+            if moves == 0:
+                break
+    return repair(ind, True)
+
 def mutation(ind: Individual):
     genome = ind.genome_copy
     locus = random.randint(0, len(genome)-1)
 
-    new_allele = alleles[random.randint(0, len(alleles)-1)]
-
-    genome[locus] = new_allele
+    genome[locus] = random.randint(0, len(alleles)-1)
 
-    return Individual(genome=genome)
+    # the counters of the parent are updated with the swapped genes only
+    o = ind.derive(genome)
+    o._remove(ind.genome[locus])
+    o._add(genome[locus])
+    return o
 
 def recombination(ind1: Individual, ind2: Individual):
-    genome1 = ind1.genome_copy
-    genome2 = ind2.genome_copy
-    new_genome = []
+    genome1 = ind1.genome
+    genome2 = ind2.genome
 
     splitIndex = random.randint(0, min(len(genome1), len(genome2)))
 
-    new_genome.extend(genome1[:splitIndex])
-    new_genome.extend(genome2[splitIndex:])
+    # slicing arrays of indices: the child owns a new genome, the genes are shared through "alleles"
+    genome = genome1[:splitIndex] + genome2[splitIndex:]
 
-    return Individual(new_genome)
+    # the counters of the child are derived from the parent that needs the fewest gene updates
+    if len(genome1) + len(genome2) - 2*splitIndex <= 2*splitIndex:
+        o, removed, added = ind1.derive(genome), genome1[splitIndex:], genome2[splitIndex:]
+    else:
+        o, removed, added = ind2.derive(genome), genome2[:splitIndex], genome1[:splitIndex]
+    for t in removed:
+        o._remove(t)
+    for t in added:
+        o._add(t)
+    return o
 
 def tournament(population, tournament_size=20):
+    if isinstance(population, SortedPopulation):
+        return population.tournament(tournament_size)
     return max(random.choices(population=population, k=tournament_size), key=lambda i: i.fitness)
 
-def evolution(population):
+# applies the genetic operator op to parents chosen by tournament
+def breed(op, population):
+    if op is mutation:
+        return mutation(tournament(population))
+    return recombination(tournament(population), tournament(population))
+
+# the genetic operator of every offspring is chosen once, then it is applied (on new parents) until it yields a solution.
+# with REPAIR every offspring is patched into a solution, so the operators are applied exactly once.
+# if an engine is given, all the candidate offspring of a round are checked with a single matrix product
+# runs the given number of generations and returns the population, sorted from the fittest.
+# the survivors are kept in a SortedPopulation: every offspring is inserted by binary search, evicting the worst individual.
+# offspring whose (canonical) genome is in the cache get their weight and validity from it, without being evaluated.
+# the run stops early after patience generations without improvement of the best fitness.
+# if checkpoint_path is given the state of the run is saved there every checkpoint_every generations
+# (checkpoint.CHECKPOINT_EVERY by default);
+# a run resumed from a checkpoint (see resume) goes on exactly as the interrupted one would have.
+# with a target the run stops as soon as the best weight (forced lists included) is not above it
+def evolve(population, generations: int, engine: PopulationEngine = None, cache: FitnessCache = None,
+           telemetry: Telemetry = None, patience: int = None, checkpoint_path: str = None,
+           checkpoint_every: int = None, resumed: checkpoint.Checkpoint = None,
+           target: int = None):
+    if checkpoint_every is None:
+        checkpoint_every = checkpoint.CHECKPOINT_EVERY
+    population = SortedPopulation(POPULATION_SIZE, population, unique=canonical if UNIQUE else None)
     offspring = []
-    for g in range(GENERATIONS):
+    if resumed is None:
+        start, best, stall = 0, population.best.fitness, 0
+    else:
+        start, best, stall = resumed.generation + 1, resumed.best, resumed.stall
+    if target is not None and forced_weight - best <= target:
+        stats['target_reached'] = start
+        return list(population)
+    for g in range(start, generations):
+        evaluations, rejected = stats['evaluations'], stats['rejected']
         offspring = []
-        for i in range(OFFSPRING):
-            o = Individual([])
-            if random.random() < 0.3:
-                while not check_solution(o.genome):
-                    p = tournament(population)
-                    o = mutation(p)
+        operators = [mutation if random.random() < 0.3 else recombination for i in range(OFFSPRING)]
+        while operators:
+            candidates = [breed(op, population) for op in operators]
+            if REPAIR:
+                stats['offspring_repaired'] += sum(o.uncovered > 0 for o in candidates)
+                candidates = [repair(o) for o in candidates]
+            if LOCAL_SEARCH:    # elite = fitter than the individual at rank ELITE * POPULATION_SIZE
+                elite = -population.fitness[min(len(population), max(1, int(ELITE * POPULATION_SIZE))) - 1]
+                candidates = [local_search(o) if o.valid and o.fitness > elite else o for o in candidates]
+            keys = [canonical(o.genome) for o in candidates] if cache is not None else [None] * len(candidates)
+            cached = [cache.get(k) for k in keys] if cache is not None else [None] * len(candidates)
+            todo = [o for o, c in zip(candidates, cached) if c is None]
+            if engine is not None:
+                results = iter(engine.evaluate_individuals(todo))
             else:
-                while not check_solution(o.genome):
-                    p1 = tournament(population)
-                    p2 = tournament(population)
-                    o = recombination(p1, p2)
-            
-            offspring.append(o)
-        population += offspring
-        population = sorted(population, key = lambda i: i.fitness, reverse = True)[:POPULATION_SIZE]
+                results = iter([o.valid for o in todo])
+            valid = list()
+            for o, k, c in zip(candidates, keys, cached):
+                if c is None:
+                    valid.append(next(results))
+                    if cache is not None:
+                        cache.put(k, (o.weight, valid[-1]))
+                else:
+                    o.weight, v = c
+                    valid.append(v)
+            stats['evaluations'] += len(todo)
+            stats['rejected'] += valid.count(False)
+            offspring += [o for o, v in zip(candidates, valid) if v]
+            operators = [op for op, v in zip(operators, valid) if not v]
+        for o in offspring:
+            if not population.insert(o):
+                stats['discarded'] += 1
+
+        if telemetry is not None:
+            telemetry.record(g, population, stats['evaluations'] - evaluations, stats['rejected'] - rejected)
+        if population.best.fitness > best:
+            best, stall = population.best.fitness, 0
+            if target is not None and forced_weight - best <= target:
+                stats['target_reached'] = g + 1
+                break
+        else:
+            stall += 1
+            if patience is not None and stall >= patience:
+                stats['early_stop'] = g
+                break
+        if checkpoint_path is not None and (g + 1) % checkpoint_every == 0:
+            checkpoint.save(checkpoint_path, g, population, best, stall, stats, cache)
+
+    return list(population)
+
+# rebuilds the population saved in a checkpoint and restores the RNG and the counters of the run
+# (the saved fitness cache is in the returned checkpoint)
+def resume(path: str):
+    saved = checkpoint.load(path)
+    stats.update(saved.stats)
+    return [Individual(g) for g in saved.genomes], saved
 
-    return population[0]
+def evolution(population, engine: PopulationEngine = None, cache: FitnessCache = None, telemetry: Telemetry = None,
+              resumed: checkpoint.Checkpoint = None):
+    return evolve(population, GENERATIONS, engine, cache, telemetry, PATIENCE, CHECKPOINT,
+                  resumed=resumed)[0]
 
 if __name__ == '__main__':
-    population = initialize_population(alleles)
+    load_instance()
+    resumed = None
+    if RESUME and CHECKPOINT and os.path.exists(CHECKPOINT):
+        population, resumed = resume(CHECKPOINT)
+        print(f"resuming from generation {resumed.generation + 1}")
+    else:
+        population = seed_population(SEEDS) if SEEDS else []
+        population += initialize_population(alleles, POPULATION_SIZE - len(population))
+    engine = PopulationEngine(alleles, n, forced_cover) if USE_ENGINE else None
+    if engine is not None:
+        engine.evaluate_individuals(population)
     
-    solution = evolution(population)
+    if resumed is not None and resumed.cache is not None:
+        cache = resumed.cache
+    else:
+        cache = FitnessCache() if CACHE else None
+    telemetry = Telemetry(TELEMETRY, resumed.generation if resumed is not None else None) if TELEMETRY else None
+    solution = evolution(population, engine, cache, telemetry, resumed)
+    if telemetry is not None:
+        telemetry.close()
     print(f"n: {n}")
-    print(f"weight: {solution.weight}")
+    print(f"weight: {solution.weight + forced_weight}")
     
-    print(solution.representation)
+    print(solution.representation | forced_cover)
+    print(f"evaluations: {stats['evaluations']}, rejected: {stats['rejected']}, repaired: {stats['repaired']}, discarded: {stats['discarded']}")
+    if REPAIR:  # every repaired offspring would have been at least one rejected evaluation
+        print(f"wasted evaluations saved by the repair: at least {stats['offspring_repaired']}")
+    if 'early_stop' in stats:
+        print(f"early stop at generation {stats['early_stop']}: no improvement in the last {PATIENCE} generations")
+    if cache is not None:
+        print(f"fitness cache: {cache.hits} hits, {cache.misses} misses (hit rate {cache.hit_rate:.1%})")
 
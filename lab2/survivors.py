@@ -0,0 +1,64 @@
+import random
+from array import array
+from bisect import bisect_right
+
+class SortedPopulation:
+    """Bounded population kept sorted from the fittest individual, with the fitness values in a flat array.
+    An offspring is placed by binary search and the worst individual is evicted when the population is full.
+    If a unique function is given (e.g. the canonical form of the genome), individuals with the same unique(genome)
+    of a member are rejected"""
+
+    def __init__(self, capacity: int, individuals=(), unique=None):
+        self._capacity = capacity
+        self._unique = unique
+        self._members = set()   # unique(genome) of the members
+        self._individuals = list()
+        # negated fitness, so that the array is in ascending order as bisect expects
+        self._keys = array("d")
+        for ind in sorted(individuals, key=lambda i: i.fitness, reverse=True):
+            self.insert(ind)
+
+    def __len__(self):
+        return len(self._individuals)
+
+    def __getitem__(self, i):
+        return self._individuals[i]
+
+    def __iter__(self):
+        return iter(self._individuals)
+
+    @property
+    def fitness(self):
+        # fitness of the i-th individual is -keys[i]
+        return self._keys
+
+    @property
+    def best(self):
+        return self._individuals[0]
+
+    def insert(self, ind) -> bool:
+        # returns False if ind is not fitter than the worst individual of a full population.
+        # among individuals with the same fitness the older ones come first, as with a stable sort
+        key = -ind.fitness
+        if len(self._individuals) >= self._capacity and key >= self._keys[-1]:
+            return False
+        if self._unique is not None:
+            u = self._unique(ind.genome)
+            if u in self._members:
+                return False
+            self._members.add(u)
+        pos = bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._individuals.insert(pos, ind)
+        if len(self._individuals) > self._capacity:
+            self._keys.pop()
+            evicted = self._individuals.pop()
+            if self._unique is not None:
+                self._members.remove(self._unique(evicted.genome))
+        return True
+
+    def tournament(self, tournament_size: int = 20):
+        # samples indices as random.choices does and picks the fittest of them by reading the flat fitness array
+        n = len(self._individuals)
+        idx = [int(random.random() * n) for _ in range(tournament_size)]
+        return self._individuals[min(idx, key=self._keys.__getitem__)]
@@ -0,0 +1,53 @@
+import json
+import os
+import time
+from fitness_cache import canonical
+
+class Telemetry:
+    """Writes one JSON line per generation with the fitness statistics, the diversity and the throughput of the GA.
+    When a run is resumed from the checkpoint of generation resumed, the records up to that generation are kept,
+    the new ones are appended and the wall time goes on from the last kept record"""
+
+    def __init__(self, path: str, resumed: int = None):
+        offset = 0.0
+        if resumed is not None and os.path.exists(path):
+            # the records written after the checkpoint belong to generations that will be run again
+            with open(path) as f:
+                kept = [l for l in f if l.strip() and json.loads(l)["generation"] <= resumed]
+            with open(path, "w") as f:
+                f.writelines(kept)
+            if kept:
+                offset = json.loads(kept[-1])["wall_time"]
+        self._file = open(path, "a" if resumed is not None else "w")
+        self._start = time.perf_counter() - offset
+        self._last = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def record(self, generation: int, population, evaluations: int, rejected: int, **extra) -> dict:
+        # population is a SortedPopulation (fittest first); evaluations and rejected refer to this generation only.
+        # diversity is the fraction of distinct genomes (in canonical form) in the population
+        now = time.perf_counter()
+        fitness = population.fitness    # negated fitness values, ascending
+        r = {
+            "generation": generation,
+            "best": -fitness[0],
+            "mean": -sum(fitness) / len(fitness),
+            "worst": -fitness[-1],
+            "diversity": len(set(canonical(i.genome) for i in population)) / len(population),
+            "rejected": rejected,
+            "evaluations_per_second": evaluations / (now - self._last) if now > self._last else None,
+            "wall_time": now - self._start,
+            **extra,
+        }
+        self._last = now
+        self._file.write(json.dumps(r) + "\n")
+        self._file.flush()
+        return r
@@ -1,5 +1,9 @@
 from nim_utils import *
 from collections import namedtuple
+import nim_batch
+from fitness_store import FitnessStore
+from parallel_fitness import ParallelEvaluator
+from racing import Racer
 
 def greedy_pick(state: Nim) -> Nimply: # (not to be confused with Greedy Nim, which is a variation of how the game is played)
     # this rule assumes that every time the opponent makes a move, it will always take all the elements in a row, leaving it empty
@@ -116,34 +120,71 @@ def make_strategy(g: Genome) -> Callable:
 
     return strategy
 
+BATCH_GAMES = None  # games per fitness evaluation played by the batched simulator (nim_batch), None = evaluate() with NUM_MATCHES games
+
 def fitness(g: Genome) -> float:
+    if BATCH_GAMES:
+        return nim_batch.evaluate(nim_batch.make_strategy(g), BATCH_GAMES)
     strategy = make_strategy(g=g)
     return evaluate(strategy=strategy)
 
-def tournament(population, tournament_size=20):
-    return max(random.choices(population=population, k=tournament_size), key=lambda i: fitness(i))
+# score is the fitness function to use, e.g. a FitnessStore. with a racer the winner is chosen by racing the candidates
+def tournament(population, tournament_size=20, score=fitness, racer: Racer = None):
+    candidates = random.choices(population=population, k=tournament_size)
+    if racer is not None:
+        return racer.select(candidates)[0]
+    return max(candidates, key=lambda i: score(i))
 
 POPULATION_SIZE = 10
 OFFSPRING = 5
 GENERATIONS = 10
-
-def evolution(population):
+REFINE_GAMES = None     # the survivors are re-evaluated with more games until their fitness is based on this many games
+PARALLEL = False        # test_evolution evaluates the fitness of every generation in a process pool (see parallel_fitness)
+RACING = False          # test_evolution selects parents and survivors by racing them (see racing)
+
+# games played by a call to fitness
+def games_per_fitness() -> int:
+    return BATCH_GAMES or NUM_MATCHES
+
+# with a FitnessStore, every genome is simulated once (plus the refinements of the survivors).
+# with a ParallelEvaluator, the genomes of every generation are evaluated in two batches: the population
+# (the tournament candidates) before the tournaments and the offspring before survival selection.
+# with a Racer, parents and survivors are selected by racing, which plays only the games needed to tell them apart
+# (it can't be combined with a store or an evaluator)
+def evolution(population, store: FitnessStore = None, evaluator: ParallelEvaluator = None, racer: Racer = None):
+    if racer is not None and (store is not None or evaluator is not None):
+        raise ValueError("racing selection doesn't use a FitnessStore or a ParallelEvaluator")
+    if evaluator is not None and store is None:
+        store = FitnessStore(fitness, games_per_fitness())
+    score = fitness if store is None else store
     offspring = []
     for g in range(GENERATIONS):
+        if evaluator is not None:
+            evaluator.score(population, store, games_per_fitness())
         offspring = []
         for i in range(OFFSPRING):
             o = None
             if random.random() < 0.3:
-                p = tournament(population)
+                p = tournament(population, score=score, racer=racer)
                 o = mutation(p)
             else:
-                p1 = tournament(population)
-                p2 = tournament(population)
+                p1 = tournament(population, score=score, racer=racer)
+                p2 = tournament(population, score=score, racer=racer)
                 o = recombination(p1, p2)
             
             offspring.append(o)
+        if evaluator is not None:
+            evaluator.score(offspring, store, games_per_fitness())
         population += offspring
-        population = sorted(population, key = lambda i: fitness(i), reverse = True)[:POPULATION_SIZE]
+        if racer is not None:
+            population = racer.select(population, POPULATION_SIZE)
+        else:
+            population = sorted(population, key = lambda i: score(i), reverse = True)[:POPULATION_SIZE]
+        if evaluator is not None and REFINE_GAMES:
+            evaluator.refine(population, store, games_per_fitness(), REFINE_GAMES)
+        elif store is not None and REFINE_GAMES:
+            for i in population:
+                store.refine(i, REFINE_GAMES)
 
     return population[0]
 
@@ -0,0 +1,48 @@
+from typing import Callable
+
+class FitnessStore:
+    """Win rate of every genome evaluated so far, with the number of games it is based on.
+    fitness(genome) plays games_per_call games; a genome already in the store is not simulated again,
+    and refine plays more games for it, averaging them with the previous ones"""
+
+    def __init__(self, fitness: Callable, games_per_call: int):
+        self._fitness = fitness
+        self._games_per_call = games_per_call
+        self._data = dict()     # genome -> (win rate, games)
+        self.simulated = 0      # games played
+        self.saved = 0          # games that would have been played without the store
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, genome):
+        return genome in self._data
+
+    def __call__(self, genome) -> float:
+        if genome in self._data:
+            self.saved += self._games_per_call
+            return self._data[genome][0]
+        rate = self._fitness(genome)
+        self.simulated += self._games_per_call
+        self._data[genome] = (rate, self._games_per_call)
+        return rate
+
+    def games(self, genome) -> int:
+        return self._data[genome][1] if genome in self._data else 0
+
+    # merges the win rate over games more games (e.g. played by a ParallelEvaluator) with the stored one
+    def add(self, genome, rate: float, games: int) -> float:
+        old, played = self._data.get(genome, (0.0, 0))
+        rate = (old * played + rate * games) / (played + games)
+        self._data[genome] = (rate, played + games)
+        self.simulated += games
+        return rate
+
+    # plays games_per_call more games for genome while it has been evaluated on fewer than max_games
+    def refine(self, genome, max_games: int) -> float:
+        if genome not in self._data:
+            return self(genome)
+        rate, games = self._data[genome]
+        if games < max_games:
+            rate = self.add(genome, self._fitness(genome), self._games_per_call)
+        return rate
@@ -0,0 +1,112 @@
+import random
+from typing import Callable
+import numpy as np
+from nim_utils import NIM_SIZE
+
+# Nim games played in batches: the state of G games with R rows is a (G x R) integer array and a batched strategy
+# maps the rows of the games still running to one move per game, as two arrays (row, num_objects).
+# the strategies draw their random numbers from a numpy Generator instead of the random module
+
+NUM_GAMES = 10_000
+
+# index of a random non-empty row of every game, uniformly among the rows where mask is True
+def random_row(rows: np.ndarray, rng: np.random.Generator, mask: np.ndarray = None) -> np.ndarray:
+    keys = rng.random(rows.shape)
+    keys[~(rows > 0 if mask is None else mask)] = -1
+    return keys.argmax(axis=1)
+
+# integers in [low, high], element-wise
+def randint(low: np.ndarray, high: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    return low + (rng.random(np.shape(high)) * (high - low + 1)).astype(np.int64)
+
+def row_values(rows: np.ndarray, row: np.ndarray) -> np.ndarray:
+    return rows[np.arange(len(rows)), row]
+
+# same as nim_utils.pure_random: a random non-empty row, a random number of objects
+def pure_random(rows: np.ndarray, rng: np.random.Generator):
+    row = random_row(rows, rng)
+    return row, randint(1, row_values(rows, row), rng)
+
+# same as nim_utils.optimal_startegy: the first move (by row, then number of objects) leading to nim-sum 0,
+# otherwise a random move among all the possible ones
+def optimal(rows: np.ndarray, rng: np.random.Generator):
+    total = np.bitwise_xor.reduce(rows, axis=1)
+    target = rows ^ total[:, None]
+    good = target < rows
+    row = good.argmax(axis=1)
+    num = row_values(rows, row) - row_values(target, row)
+    lost = ~good.any(axis=1)
+    if lost.any():
+        # a uniform move: object i (counting the objects row by row) stands for the move taking i + 1 - (objects before its row)
+        r = rows[lost]
+        i = (rng.random(len(r)) * r.sum(axis=1)).astype(np.int64)
+        before = np.cumsum(r, axis=1) - r
+        row[lost] = (before <= i[:, None]).sum(axis=1) - 1
+        num[lost] = i + 1 - row_values(before, row[lost])
+    return row, num
+
+# batched versions of the rules of evolution.py, see there for their description
+def greedy_pick(rows: np.ndarray, rng: np.random.Generator):
+    odd = (rows > 0).sum(axis=1) % 2 == 1
+    big = rows > 1
+    leave_one = ~odd & big.any(axis=1)
+    row = random_row(rows, rng)
+    row[leave_one] = random_row(rows[leave_one], rng, big[leave_one])
+    num = row_values(rows, row)
+    return row, num - leave_one
+
+def even_odd(rows: np.ndarray, rng: np.random.Generator):
+    row = random_row(rows, rng)
+    v = row_values(rows, row)
+    odd_row = row % 2 == 1
+    # odd rows: 2 * randint(0, v // 2) + 1, minus 1 if v is even (it can be 0, as in the sequential rule)
+    odd_num = 2 * randint(0, v // 2, rng) + 1 - (v % 2 == 0)
+    # even rows: 1 if v is 1, otherwise 2 * randint(1, v // 2)
+    even_num = np.where(v == 1, 1, 2 * randint(1, np.maximum(v // 2, 1), rng))
+    return row, np.where(odd_row, odd_num, even_num)
+
+def shy_pick(rows: np.ndarray, rng: np.random.Generator):
+    return random_row(rows, rng), np.ones(len(rows), dtype=np.int64)
+
+rules = [pure_random, greedy_pick, even_odd, shy_pick]
+
+# batched evolution.make_strategy: every game draws the rule of its move from the probabilities in genome
+def make_strategy(genome) -> Callable:
+    p = np.asarray(genome, dtype=float)
+    p = p / p.sum()
+    def strategy(rows: np.ndarray, rng: np.random.Generator):
+        rule = rng.choice(len(rules), size=len(rows), p=p)
+        row = np.zeros(len(rows), dtype=np.int64)
+        num = np.zeros(len(rows), dtype=np.int64)
+        for i, r in enumerate(rules):
+            games = rule == i
+            if games.any():
+                row[games], num[games] = r(rows[games], rng)
+        return row, num
+    return strategy
+
+# plays games between strategy (moving first) and opponent, all at once. returns a boolean array, True where strategy won
+def play(strategy: Callable, opponent: Callable, games: int = NUM_GAMES, nim_size: int = NIM_SIZE,
+         rng: np.random.Generator = None) -> np.ndarray:
+    if rng is None:     # drawn from the random module, so that random.seed still makes the runs reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+    rows = np.tile(np.arange(nim_size, dtype=np.int64) * 2 + 1, (games, 1))
+    won = np.zeros(games, dtype=bool)
+    running = np.arange(games)
+    players = (strategy, opponent)
+    player = 0
+    while len(running):
+        r = rows[running]
+        row, num = players[player](r, rng)
+        r[np.arange(len(r)), row] -= num
+        rows[running] = r
+        over = r.sum(axis=1) == 0
+        won[running[over]] = player == 0    # who takes the last object wins
+        running = running[~over]
+        player = 1 - player
+    return won
+
+# batched nim_utils.evaluate: win rate of strategy against pure_random
+def evaluate(strategy: Callable, games: int = NUM_GAMES, opponent: Callable = pure_random,
+             rng: np.random.Generator = None) -> float:
+    return float(play(strategy, opponent, games, rng=rng).mean())
@@ -1,5 +1,4 @@
 from collections import namedtuple
-from copy import deepcopy
 from operator import xor
 import random
 from itertools import accumulate
@@ -38,25 +37,46 @@ def nim_sum(state: Nim) -> int:
     *_, result = accumulate(state.rows, xor)
     return result
 
+class CookedStatus(dict):
+    """Rules used for evolving a solution, computed from the rows of a Nim state.
+    The scalar fields are computed in a single pass over the rows; "possible_moves" and "brute_force"
+    only when they are first read. The nim-sum after a move (r, o) is total ^ rows[r] ^ (rows[r] - o),
+    so no state is copied"""
+
+    def __init__(self, state: Nim):
+        super().__init__()
+        self._rows = state.rows
+        self._k = state.k
+        active, shortest, longest, total = 0, None, 0, 0
+        for r, c in enumerate(self._rows):
+            total ^= c
+            if c > 0:
+                active += 1
+                if shortest is None or c < self._rows[shortest]:
+                    shortest = r
+            if c > self._rows[longest]:
+                longest = r
+        self["active_rows_number"] = active
+        self["shortest_row"] = shortest
+        self["longest_row"] = longest
+        self["nim_sum"] = total
+
+    def __missing__(self, key):
+        if key == "possible_moves":
+            value = [
+                (r, o) for r, c in enumerate(self._rows) for o in range(1, c + 1) if self._k is None or o <= self._k
+            ]
+        elif key == "brute_force":
+            total = self["nim_sum"]
+            value = [((r, o), total ^ self._rows[r] ^ (self._rows[r] - o)) for r, o in self["possible_moves"]]
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
 # cook_status returns a dict of rules used for evolving a solution
 def cook_status(state: Nim) -> dict:
-    cooked = dict()
-    cooked["possible_moves"] = [
-        (r, o) for r, c in enumerate(state.rows) for o in range(1, c + 1) if state.k is None or o <= state.k
-    ]
-    cooked["active_rows_number"] = sum(o > 0 for o in state.rows)
-    cooked["shortest_row"] = min((x for x in enumerate(state.rows) if x[1] > 0), key=lambda y: y[1])[0]
-    cooked["longest_row"] = max((x for x in enumerate(state.rows)), key=lambda y: y[1])[0]
-    cooked["nim_sum"] = nim_sum(state)
-
-    brute_force = list()
-    for m in cooked["possible_moves"]:
-        tmp = deepcopy(state)
-        tmp.nimming(m)
-        brute_force.append((m, nim_sum(tmp)))
-    cooked["brute_force"] = brute_force
-
-    return cooked
+    return CookedStatus(state)
 
 # working solutions given by the professor. "pure_random" is used for evolving a solution based on rules
 def pure_random(state: Nim) -> Nimply:
@@ -0,0 +1,82 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import nim_utils
+import nim_batch
+from fitness_store import FitnessStore
+
+WORKERS = os.cpu_count()
+CHUNKS_PER_WORKER = 4   # tasks per worker in every batch, so that a slow task doesn't leave the other cores idle
+BLOCK = 25              # games played with the same RNG stream, the smallest unit of work of a task
+BATCH_BLOCK = 1000      # the same, for the batched simulator (smaller blocks waste its vectorization)
+
+# plays the blocks of games of the genome's strategy against pure_random, each block with its own seed,
+# and returns the number of games won. the state of the random module and NUM_MATCHES are left as they were
+def play_blocks(genome, blocks: list, batched: bool) -> int:
+    import evolution    # imported here, since evolution imports this module
+    won = 0
+    state, num_matches = random.getstate(), nim_utils.NUM_MATCHES
+    for games, seed in blocks:
+        if batched:
+            won += int(nim_batch.play(nim_batch.make_strategy(genome), nim_batch.pure_random, games,
+                                      rng=np.random.default_rng(seed)).sum())
+        else:
+            random.seed(seed)
+            nim_utils.NUM_MATCHES = games
+            won += round(nim_utils.evaluate(evolution.make_strategy(genome)) * games)
+    random.setstate(state)
+    nim_utils.NUM_MATCHES = num_matches
+    return won
+
+class ParallelEvaluator:
+    """Evaluates batches of genomes in a process pool.
+    The games of a genome are played in blocks of BLOCK (or BATCH_BLOCK) games, each with its own RNG stream derived from
+    (seed, batch, genome, block), so the results don't depend on the number of workers nor on the order
+    in which the tasks are run. The blocks of a genome are split among several tasks when there are too few
+    genomes to give CHUNKS_PER_WORKER tasks to every worker"""
+
+    def __init__(self, workers: int = WORKERS, seed: int = 0, batched: bool = False):
+        self._workers = workers
+        self._seed = seed
+        self._batched = batched
+        self._batches = 0
+        self._pool = ProcessPoolExecutor(workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+
+    # win rate of every genome over games games
+    def evaluate(self, genomes: list, games: int) -> list:
+        if not genomes:
+            return []
+        block = BATCH_BLOCK if self._batched else BLOCK
+        sizes = [block] * (games // block) + ([games % block] if games % block else [])
+        chunks = max(1, min(-(-CHUNKS_PER_WORKER * self._workers // len(genomes)), len(sizes)))
+        tasks = list()
+        for i, g in enumerate(genomes):
+            blocks = [(size, int(np.random.SeedSequence([self._seed, self._batches, i, b]).generate_state(1)[0]))
+                      for b, size in enumerate(sizes)]
+            for c in range(chunks):
+                tasks.append((g, blocks[c::chunks], self._batched))
+        self._batches += 1
+        won = list(self._pool.map(play_blocks, *zip(*tasks)))
+        return [sum(won[i * chunks:(i + 1) * chunks]) / games for i in range(len(genomes))]
+
+    # evaluates in one batch the genomes missing from store, once each, and stores their win rates
+    def score(self, genomes: list, store: FitnessStore, games: int):
+        todo = list(dict.fromkeys(g for g in genomes if g not in store))
+        for g, rate in zip(todo, self.evaluate(todo, games)):
+            store.add(g, rate, games)
+
+    # plays games more games for the genomes evaluated on fewer than max_games
+    def refine(self, genomes: list, store: FitnessStore, games: int, max_games: int):
+        todo = list(dict.fromkeys(g for g in genomes if store.games(g) < max_games))
+        for g, rate in zip(todo, self.evaluate(todo, games)):
+            store.add(g, rate, games)
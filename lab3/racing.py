@@ -0,0 +1,65 @@
+import math
+from collections import Counter
+import numpy as np
+from nim_utils import NUM_MATCHES
+from parallel_fitness import play_blocks
+
+BATCH = 10      # minimum number of games played by every candidate still in the race before checking the confidence bounds
+Z = 2.0         # width of the confidence intervals, in standard errors
+
+# Agresti-Coull confidence interval of a win rate: centred on the adjusted estimate, well-behaved also with 0 or all games won
+def interval(won: int, games: int, z: float = Z) -> tuple:
+    p = (won + z * z / 2) / (games + z * z)
+    r = z * math.sqrt(p * (1 - p) / (games + z * z))
+    return p - r, p + r
+
+class Racer:
+    """Selects the best genomes out of a set of candidates by racing them: all the candidates still in the race play
+    batch more games, then the ones whose upper confidence bound is below the lower bound of the k-th leader are dropped.
+    The race stops when only k candidates are left or after max_games games.
+    Duplicated genomes race once; as with sorting, every copy of a selected genome takes one of the k places
+    In every batch all the candidates play with the same seed (common random numbers), so that the
+    differences between their results depend more on the strategies than on the luck of the draw"""
+
+    def __init__(self, batch: int = None, max_games: int = NUM_MATCHES, z: float = Z, seed: int = 0, batched: bool = False):
+        self._batch = batch if batch is not None else max(BATCH, max_games // 20)
+        self._max_games = max_games
+        self._z = z
+        self._seed = seed
+        self._batched = batched
+        self._races = 0
+        self.played = 0     # games played
+        self.full = 0       # games that playing max_games for every candidate (as fitness does) would have taken
+
+    # the k best genomes, best first
+    def select(self, genomes: list, k: int = 1) -> list:
+        self.full += len(genomes) * self._max_games
+        if len(genomes) <= k:
+            return list(genomes)
+        copies = Counter(genomes)
+        alive = list(copies)
+        # with k or fewer distinct genomes no one can be dropped, but they are still ranked to choose the copies to keep
+        rank_only = len(alive) <= k
+        won = dict.fromkeys(alive, 0)
+        games = 0
+        b = 0
+        while (len(alive) > k or rank_only and len(alive) > 1) and games < self._max_games:
+            size = min(self._batch, self._max_games - games)
+            seed = int(np.random.SeedSequence([self._seed, self._races, b]).generate_state(1)[0])
+            for g in alive:
+                won[g] += play_blocks(g, [(size, seed)], self._batched)
+            self.played += size * len(alive)
+            games += size
+            b += 1
+            if not rank_only:
+                bounds = {g: interval(won[g], games, self._z) for g in alive}
+                threshold = sorted((lo for lo, _ in bounds.values()), reverse=True)[k - 1]
+                alive = [g for g in alive if bounds[g][1] >= threshold]
+        self._races += 1
+        # at least k distinct genomes are left (or all of them), hence enough copies
+        ranked = sorted(alive, key=lambda g: won[g], reverse=True)
+        return [g for g in ranked for _ in range(copies[g])][:k]
+
+    @property
+    def saved(self):
+        return 1 - self.played / self.full if self.full else 0.0
@@ -4,7 +4,16 @@ from evolution import *
 if __name__ == '__main__':
 
     first_population = initialize_population(POPULATION_SIZE)
-    best_individual = evolution(first_population)
+    racer = Racer(max_games=games_per_fitness(), batched=bool(BATCH_GAMES)) if RACING else None
+    store = FitnessStore(fitness, games_per_fitness()) if racer is None else None
+    evaluator = ParallelEvaluator(batched=bool(BATCH_GAMES)) if PARALLEL and racer is None else None
+    best_individual = evolution(first_population, store, evaluator, racer)
+    if evaluator is not None:
+        evaluator.close()
 
     print(best_individual)
-    print(fitness(best_individual))
\ No newline at end of file
+    print(fitness(best_individual))
+    if racer is not None:
+        print(f"racing: {racer.played} games played instead of {racer.full} ({racer.saved:.0%} saved)")
+    else:
+        print(f"simulated games: {store.simulated}, saved by the fitness store: {store.saved} ({len(store)} genomes)")
\ No newline at end of file